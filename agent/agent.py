@@ -4,36 +4,165 @@ This module provides an AI agent that can understand natural language queries
 and perform appropriate Twitter operations based on user intent.
 """
 
-import json
+import re
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any, Callable
+import orjson
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Any, AsyncIterator, Callable, Set, Tuple, Union
+import requests
+from requests.adapters import HTTPAdapter
 from smolagents import CodeAgent
+from smolagents.memory import ActionStep
 
 from twitter.api import TwitterAPI
-from agent.tools import TwitterTools
+from agent.tools import TwitterTools, record_tool_calls
 from agent.base_agent import BaseAgent
-from agent.prompts import AgentPrompts
+from agent.prompts import TWITTER_ASSISTANT_PROMPT, PREVIOUS_OBSERVATIONS_TEMPLATE
 from agent.models import ActionTaken, AgentResponse
-from database.db import save_tweets
+from agent.plans import PlanTemplates, run_plan
+from config import PLAN_TEMPLATES
+from database.db import save_tweets_bulk
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum number of user sessions kept in memory before the least recently used is evicted
+MAX_SESSIONS = 1024
+
+# Seconds a session may stay idle before it is cleaned up, and how often to sweep for them
+SESSION_MAX_AGE = 3600
+SESSION_CLEANUP_INTERVAL = SESSION_MAX_AGE / 4
+
+# Number of recent requests (with their results) shown to the agent with each new request
+HISTORY_SIZE = 8
+
+# Maximum number of pooled keep-alive connections to the Twitter API shared by all sessions
+HTTP_POOL_SIZE = 20
+
+# Maximum number of cached agent responses and how long (seconds) they stay fresh
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL = 30
+
+# Queries mentioning any of these words may change Twitter state and are never cached
+_WRITE_RE = re.compile(r'\b(post|tweet|reply|like|unlike|follow|unfollow|retweet|delete)\b', re.IGNORECASE)
+
+# Tweets to persist: (user_id, tweets, tweet_type)
+TweetSave = Tuple[str, List[Dict], str]
+
+def _save_timeline(user_id: str, tool_input: Dict, tool_output: Any) -> Optional[TweetSave]:
+    """Return the timeline tweets to save from a get_timeline_tool result, if any."""
+    if isinstance(tool_output, dict) and 'tweets' in tool_output:
+        return (user_id, tool_output['tweets'], "timeline")
+    return None
+
+def _save_search(user_id: str, tool_input: Dict, tool_output: Any) -> Optional[TweetSave]:
+    """Return the search tweets to save from a search_tweets_tool result, if any."""
+    if isinstance(tool_output, dict) and 'tweets' in tool_output:
+        search_query = tool_input.get('query', 'unknown')
+        return (user_id, tool_output['tweets'], f"search_{search_query}")
+    return None
+
+def _save_posted(user_id: str, tool_input: Dict, tool_output: Any) -> Optional[TweetSave]:
+    """Return the tweet to save from a successful post_tweet_tool result, if any."""
+    if isinstance(tool_output, dict) and tool_output.get('success'):
+        tweet_data = {
+            'id': tool_output.get('tweet_id', ''),
+            'text': tool_output.get('text', tool_input.get('text', ''))
+        }
+        return (user_id, [tweet_data], "posted")
+    return None
+
+# Sentinel marking the end of a streamed agent run
+_STREAM_DONE = object()
+
 class TwitterAgent(BaseAgent):
     """Twitter AI agent that can interact with Twitter API using smolagents."""
     
-    # Dictionary to store user sessions
-    _user_sessions = {}
-    _session_lock = asyncio.Lock()
+    # LRU-ordered user sessions (least recently used first)
+    _user_sessions: "OrderedDict[Tuple[str, Any], dict]" = OrderedDict()
+    # Per-session-key locks so distinct users can initialize concurrently
+    _key_locks: Dict[Tuple[str, Any], asyncio.Lock] = {}
+    _locks_lock = asyncio.Lock()
+    _cleanup_task: Optional[asyncio.Task] = None
+    # HTTP session shared by every user's Twitter client
+    _http: Optional[requests.Session] = None
+    # Background tweet-save tasks that are still running
+    _background_tasks: Set[asyncio.Task] = set()
+    # Tool name -> helper returning the tweets to save from its result (or None)
+    _SAVE_HANDLERS: Dict[str, Callable[[str, Dict, Any], Optional[TweetSave]]] = {
+        'get_timeline_tool': _save_timeline,
+        'search_tweets_tool': _save_search,
+        'post_tweet_tool': _save_posted,
+    }
+    # LRU cache of recent read-only responses: (session_key, query) -> (timestamp, response)
+    _response_cache: "OrderedDict[Tuple[Tuple[str, Any], str], Tuple[float, AgentResponse]]" = OrderedDict()
+    # Tool calls of earlier successful queries, replayed for queries differing only in arguments
+    _plan_templates = PlanTemplates()
     
     def __init__(self, model_name: str = "gpt-4o", debug_mode: bool = False):
         # Initialize the base agent
         super().__init__(model=model_name, debug_mode=debug_mode)
         logger.info(f"Initialized TwitterAgent with model: {model_name}")
     
-    async def _get_user_session(self, user_id: Optional[Any] = None, twitter_user_id: Optional[str] = None) -> Dict:
+    @staticmethod
+    def _session_key(user_id: Optional[Any] = None, twitter_user_id: Optional[str] = None) -> Tuple[str, Any]:
+        """
+        Build the key identifying a user's session.
+        """
+        return ("u", str(user_id)) if user_id is not None else ("t", str(twitter_user_id))
+    
+    @staticmethod
+    def _is_read_only_query(query: str) -> bool:
+        """
+        Check whether a query only reads from Twitter and may be served from the cache.
+        """
+        return _WRITE_RE.search(query) is None
+    
+    @classmethod
+    def _get_http(cls) -> requests.Session:
+        """
+        Get the HTTP session shared by all Twitter clients, creating it on first use.
+        """
+        if cls._http is None:
+            http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            http.mount("https://", adapter)
+            cls._http = http
+        return cls._http
+    
+    @classmethod
+    async def _get_key_lock(cls, session_key: Tuple[str, Any]) -> asyncio.Lock:
+        """
+        Get the lock guarding creation and removal of one session.
+        """
+        async with cls._locks_lock:
+            return cls._key_locks.setdefault(session_key, asyncio.Lock())
+    
+    @classmethod
+    def start_session_cleanup(cls) -> None:
+        """
+        Start the periodic session cleanup task unless it is already running.
+        """
+        # Stored on the class so there is exactly one task and it isn't GC'd
+        if cls._cleanup_task is None or cls._cleanup_task.done():
+            cls._cleanup_task = asyncio.create_task(cls._cleanup_loop())
+    
+    @classmethod
+    async def stop_session_cleanup(cls) -> None:
+        """
+        Cancel the periodic session cleanup task.
+        """
+        task, cls._cleanup_task = cls._cleanup_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    @classmethod
+    async def _get_user_session(cls, user_id: Optional[Any] = None, twitter_user_id: Optional[str] = None) -> Dict:
         """
         Get or create a user session for the given user.
         
@@ -42,154 +171,490 @@ class TwitterAgent(BaseAgent):
             twitter_user_id: Optional Twitter user ID (preferred for authentication).
             
         Returns:
-            User session dictionary containing the Twitter API and tools.
+            User session dictionary containing the Twitter API and tools, with
+            its last used timestamp refreshed. The session's agent is created by
+            _get_session_agent on first use.
         """
-        # Convert user_id to string if it's not None
-        user_id_str = str(user_id) if user_id is not None else None
-        
         # Create a unique session key
-        session_key = f"user_{user_id_str}" if user_id_str else f"twitter_{twitter_user_id}"
+        session_key = cls._session_key(user_id, twitter_user_id)
         
-        async with self._session_lock:
-            # Check if session exists and is still valid
-            if session_key in self._user_sessions:
-                # Check if session is expired (for future implementation)
-                return self._user_sessions[session_key]
-            
-            # Create a new session
-            logger.info(f"Creating new session for {session_key}")
-            
-            # Initialize Twitter API
-            twitter_api = TwitterAPI(user_id=user_id, twitter_user_id=twitter_user_id)
-            await twitter_api.initialize_client()
-            
-            # Create Twitter tools
-            twitter_tools = TwitterTools(twitter_api)
-            
-            # Store session
-            session = {
-                "twitter_api": twitter_api,
-                "twitter_tools": twitter_tools,
-                "created_at": asyncio.get_event_loop().time(),
-                "last_used": asyncio.get_event_loop().time()
-            }
-            
-            self._user_sessions[session_key] = session
-            
-            # Implement session cleanup (remove old sessions after a certain time)
-            asyncio.create_task(self._cleanup_old_sessions())
-            
+        # Fast path: existing sessions are returned without taking any lock
+        session = cls._user_sessions.get(session_key)
+        if session is not None:
+            session["last_used"] = asyncio.get_running_loop().time()
+            cls._user_sessions.move_to_end(session_key)
             return session
+        
+        # Only callers for the same key wait on each other while the session is built
+        async with await cls._get_key_lock(session_key):
+            try:
+                # Another caller may have created the session while we waited
+                session = cls._user_sessions.get(session_key)
+                if session is not None:
+                    session["last_used"] = asyncio.get_running_loop().time()
+                    cls._user_sessions.move_to_end(session_key)
+                    return session
+                
+                # Create a new session
+                logger.info("Creating new session for %s", session_key)
+                
+                # Initialize Twitter API
+                twitter_api = TwitterAPI(user_id=user_id, twitter_user_id=twitter_user_id, session=cls._get_http())
+                await twitter_api.initialize_client()
+                
+                # The tools and CodeAgent are built on the first query (see _get_session_agent),
+                # so a failure there doesn't take down the session or its client
+                twitter_tools = TwitterTools(twitter_api)
+                
+                # Store session
+                now = asyncio.get_running_loop().time()
+                session = {
+                    "twitter_api": twitter_api,
+                    "twitter_tools": twitter_tools,
+                    "agent": None,
+                    # Internal user ID that tweets are saved under, if known
+                    "user_id": str(user_id) if user_id else None,
+                    # Recent requests, responses and actions, for follow-up questions
+                    "history": deque(maxlen=HISTORY_SIZE),
+                    # Held while the session's agent runs; a CodeAgent can't run two tasks at once
+                    "run_lock": asyncio.Lock(),
+                    "created_at": now,
+                    "last_used": now
+                }
+                
+                cls._user_sessions[session_key] = session
+                
+                # Evict the least recently used session when over capacity
+                if len(cls._user_sessions) > MAX_SESSIONS:
+                    evicted_key, evicted = cls._user_sessions.popitem(last=False)
+                    logger.info("Evicting least recently used session: %s", evicted_key)
+                    await evicted["twitter_api"].close()
+                
+                # Normally already started at app startup; this covers standalone use
+                cls.start_session_cleanup()
+                
+                return session
+            finally:
+                # Drop the lock even when initialization fails, so unknown IDs can't pile up locks
+                cls._key_locks.pop(session_key, None)
+    
+    @classmethod
+    async def get_twitter_api(cls, user_id: Optional[Any] = None, twitter_user_id: Optional[str] = None) -> TwitterAPI:
+        """
+        Return the Twitter API client from the user's session, creating the session if needed.
+        
+        Needs no TwitterAgent instance, so callers that only talk to Twitter don't build the model.
+        """
+        session = await cls._get_user_session(user_id, twitter_user_id)
+        return session["twitter_api"]
+    
+    @classmethod
+    def clear_caches(cls) -> None:
+        """
+        Drop cached agent responses, plan templates and Twitter reads, so the next queries fetch fresh data
+        """
+        cls._response_cache.clear()
+        cls._plan_templates.clear()
+        TwitterAPI.clear_read_cache()
+    
+    @classmethod
+    async def close_sessions(cls) -> None:
+        """
+        Close every user session and the shared HTTP session, letting pending tweet saves finish.
+        """
+        sessions = list(cls._user_sessions.values())
+        cls._user_sessions.clear()
+        cls._key_locks.clear()
+        await asyncio.gather(*(session["twitter_api"].close() for session in sessions), return_exceptions=True)
+        
+        if cls._background_tasks:
+            await asyncio.gather(*cls._background_tasks, return_exceptions=True)
+        
+        if cls._http is not None:
+            cls._http.close()
+            cls._http = None
+    
+    @classmethod
+    async def _cleanup_loop(cls):
+        """
+        Periodically remove sessions that haven't been used for a while.
+        """
+        while True:
+            await asyncio.sleep(SESSION_CLEANUP_INTERVAL)
+            try:
+                await cls._cleanup_old_sessions()
+            except Exception as e:
+                logger.exception("Error cleaning up sessions: %s", e)
     
-    async def _cleanup_old_sessions(self, max_age: float = 3600):
+    @classmethod
+    async def _cleanup_old_sessions(cls, max_age: float = SESSION_MAX_AGE):
         """
         Cleanup old sessions that haven't been used for a while.
         
         Args:
             max_age: Maximum age of sessions in seconds before cleanup (default: 1 hour).
         """
-        current_time = asyncio.get_event_loop().time()
+        current_time = asyncio.get_running_loop().time()
+        
+        # Sessions are kept in least recently used order, so the stale ones are all at the
+        # front; stop at the first fresh one instead of scanning every session
+        sessions_to_remove = []
+        for key, session in cls._user_sessions.items():
+            if current_time - session["last_used"] <= max_age:
+                break
+            sessions_to_remove.append(key)
+        
+        # Remove old sessions under their own key lock, skipping any used since the snapshot
+        evicted = []
+        for key in sessions_to_remove:
+            async with await cls._get_key_lock(key):
+                session = cls._user_sessions.get(key)
+                if session is not None and current_time - session["last_used"] > max_age:
+                    logger.info("Cleaning up old session: %s", key)
+                    del cls._user_sessions[key]
+                    evicted.append(session)
+            cls._key_locks.pop(key, None)
+        
+        if evicted:
+            await asyncio.gather(*(session["twitter_api"].close() for session in evicted))
+    
+    def _save_in_background(self, saves: List[TweetSave]) -> None:
+        """
+        Persist tweets collected during a run in one bulk write without blocking the caller.
+        
+        Args:
+            saves: (user_id, tweets, tweet_type) tuples to save.
+        """
+        async def run_saves():
+            try:
+                if await save_tweets_bulk(saves):
+                    logger.info(f"Saved {sum(len(tweets) for _, tweets, _ in saves)} tweets from {len(saves)} tool calls")
+                else:
+                    logger.error("Error saving tweets: some tweet files could not be written")
+            except Exception as e:
+                logger.error(f"Error saving tweets: {str(e)}")
+        
+        # Keep a reference so the task isn't garbage collected before it finishes
+        task = asyncio.create_task(run_saves())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    def _create_code_agent(self, tools: List) -> CodeAgent:
+        """
+        Create a smolagents CodeAgent with the provided tools.
+        """
+        return CodeAgent(
+            model=self.model,
+            tools=tools,
+            add_base_tools=False,  # Don't add default tools
+            system_prompt=TWITTER_ASSISTANT_PROMPT,
+            additional_authorized_imports=[]  # No additional imports needed for Twitter operations
+        )
+    
+    @staticmethod
+    def _run_lock(session: Dict) -> asyncio.Lock:
+        """
+        Return the lock serializing runs of the session's agent.
+        """
+        return session.setdefault("run_lock", asyncio.Lock())
+    
+    def _get_session_agent(self, session: Dict) -> CodeAgent:
+        """
+        Return the CodeAgent cached on the session, creating one only if missing.
         
-        async with self._session_lock:
-            # Find sessions to remove
-            sessions_to_remove = []
-            for key, session in self._user_sessions.items():
-                if current_time - session["last_used"] > max_age:
-                    sessions_to_remove.append(key)
+        Call this from the task that runs the agent, since it binds the session's tools,
+        and hold the session's run lock while the agent runs.
+        """
+        # Point the shared tools at this session's Twitter client for the current task
+        twitter_tools = session.get("twitter_tools")
+        if twitter_tools is not None:
+            twitter_tools.bind()
+        
+        agent = session.get("agent")
+        if agent is None:
+            agent = self._create_code_agent(session["twitter_tools"].create_tools())
+            session["agent"] = agent
+        return agent
+    
+    @staticmethod
+    def _with_history(query: str, session: Dict) -> str:
+        """
+        Prefix a query with the session's recent requests and their results, if any.
+        """
+        history = session.get("history")
+        if not history:
+            return query
+        return PREVIOUS_OBSERVATIONS_TEMPLATE.format(
+            history=orjson.dumps(list(history), default=str).decode(),
+            query=query
+        )
+    
+    @staticmethod
+    def _remember(session: Dict, query: str, response_text: Any, actions: List[Dict]) -> None:
+        """
+        Add a finished request to the session's history.
+        """
+        history = session.get("history")
+        if history is not None:
+            history.append({"query": query, "response": str(response_text), "actions_taken": actions})
+    
+    @staticmethod
+    def _failed_step_calls(step: Optional[ActionStep]) -> List[Dict[str, Any]]:
+        """
+        Return the agent's own tool calls in a step that raised, as failed calls.
+        
+        Code that fails before or between Twitter tool calls leaves no recorded result
+        for the failure, so it is reported against the ToolCall the agent made.
+        """
+        if step is None or step.error is None:
+            return []
+        error = {"error": str(step.error)}
+        if step.observations:
+            error["observations"] = step.observations
+        return [{"name": tool_call.name, "input": tool_call.arguments, "output": error} for tool_call in step.tool_calls or []]
+    
+    def _process_step(self,
+                      step: Optional[ActionStep],
+                      tool_calls: List[Dict[str, Any]],
+                      user_id: Optional[str],
+                      pending_saves: List[TweetSave]) -> List[ActionTaken]:
+        """
+        Extract the actions taken in a single agent step.
+        
+        Args:
+            step: The ActionStep the agent yielded, or None for a replayed plan.
+            tool_calls: Twitter tool calls made during the step, as {"name", "input",
+                "output"} dicts (see record_tool_calls). A step that raised also gets a
+                failed action for each of its own ToolCalls.
+            user_id: Internal user ID to save tweets under, or None to skip saving.
+            pending_saves: List collecting the tweets to save afterwards.
             
-            # Remove old sessions
-            for key in sessions_to_remove:
-                logger.info(f"Cleaning up old session: {key}")
-                del self._user_sessions[key]
+        Returns:
+            The actions taken in this step.
+        """
+        actions = []
+        
+        # Check for code execution steps
+        code = getattr(step, 'code_action', None)
+        if code:
+            logger.info(f"Agent executed code: {code}")
+        
+        for tool_call in [*tool_calls, *self._failed_step_calls(step)]:
+            get = tool_call.get
+            tool_name = get('name', '')
+            tool_input = get('input', {})
+            tool_output = get('output', {})
+            # Tools report failures as a dict with success=False or an 'error' key; a
+            # membership test on list or string outputs would scan every element instead
+            success = not (isinstance(tool_output, dict)
+                           and (tool_output.get('success') is False or 'error' in tool_output))
+            
+            # Save tweet data if applicable
+            handler = self._SAVE_HANDLERS.get(tool_name)
+            if handler and user_id is not None:
+                save = handler(user_id, tool_input, tool_output)
+                if save is not None:
+                    pending_saves.append(save)
+            
+            # Pydantic validation is skipped and nothing downstream re-validates, so
+            # keep input and output the dicts ActionTaken declares
+            actions.append(ActionTaken.model_construct(
+                tool=str(tool_name),
+                input=tool_input if isinstance(tool_input, dict) else {"args": tool_input},
+                output=tool_output if isinstance(tool_output, dict) else {"result": tool_output},
+                success=success
+            ))
+        
+        return actions
     
-
+    @staticmethod
+    def _collect_steps(agent: CodeAgent,
+                       task: str,
+                       tool_calls: List[Dict[str, Any]]) -> Tuple[List[Tuple[ActionStep, List[Dict[str, Any]]]], Any]:
+        """
+        Run the agent to completion, pairing each ActionStep with the tool calls made in it.
+        
+        run() on its own returns only the final answer, so the run is streamed instead.
+        Blocks on the model; call it from a worker thread.
+        
+        Returns:
+            The (step, tool calls) pairs and the final answer.
+        """
+        steps = []
+        recorded = 0
+        last_step = None
+        for step in agent.run(task, stream=True):
+            last_step = step
+            if isinstance(step, ActionStep):
+                steps.append((step, tool_calls[recorded:]))
+                recorded = len(tool_calls)
+        # smolagents ends the stream with a FinalAnswerStep wrapping the answer
+        return steps, getattr(last_step, 'output', last_step)
     
-    async def _run_agent_with_tools(self, query: str, tools: List, session: Optional[Dict] = None):
+    async def _run_agent_with_tools(self, query: str, session: Dict):
         """
-        Run the agent with the provided tools and handle the response.
+        Run the session's agent and handle the response.
         """
-        # Create a smolagents CodeAgent with the provided tools
         try:
-            agent = CodeAgent(
-                model=self.model,
-                tools=tools,
-                add_base_tools=False,  # Don't add default tools
-                system_prompt=AgentPrompts.get_twitter_assistant_prompt(),
-                additional_authorized_imports=[]  # No additional imports needed for Twitter operations
-            )
+            agent = self._get_session_agent(session)
         except Exception as e:
-            logger.error(f"Error creating CodeAgent: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("Error creating CodeAgent: %s", e)
             return f"I encountered an error while initializing the agent: {str(e)}. Please try again.", []
         
         # Run the agent with the query
         logger.info(f"Running agent with query: {query}")
         try:
-            # Use run_async for async execution
-            result = await agent.run_async(query)
+            # smolagents' run() drives a blocking OpenAI client, so it is moved off the event loop
+            tool_calls = record_tool_calls()
+            steps, result_output = await asyncio.to_thread(
+                self._collect_steps, agent, self._with_history(query, session), tool_calls
+            )
             
-            # Extract the actions taken from the agent's trace
+            # Extract the actions taken from the agent's steps
             actions_taken = []
+            pending_saves = []
+            user_id = session.get("user_id")
+            for step, step_calls in steps:
+                actions_taken.extend(self._process_step(step, step_calls, user_id, pending_saves))
+            
+            # Persist tweets in one background bulk write instead of on the response path
+            if pending_saves:
+                self._save_in_background(pending_saves)
             
-            # Process the trace to extract tool calls
-            if hasattr(result, 'trace') and result.trace:
-                for step in result.trace:
-                    # Check for code execution steps
-                    if hasattr(step, 'code') and step.code:
-                        logger.info(f"Agent executed code: {step.code}")
-                    
-                    # Check for tool calls
-                    if hasattr(step, 'tool_calls') and step.tool_calls:
-                        for tool_call in step.tool_calls:
-                            tool_name = tool_call.get('name', '')
-                            tool_input = tool_call.get('input', {})
-                            tool_output = tool_call.get('output', {})
-                            success = True if 'error' not in tool_output else False
-                            
-                            # Save tweet data if applicable
-                            if session and 'twitter_api' in session:
-                                user_id = session['twitter_api'].user_id
-                                if user_id:
-                                    # Check if the result contains tweet data
-                                    if tool_name == 'get_timeline_tool' and isinstance(tool_output, dict) and 'tweets' in tool_output:
-                                        # Save timeline tweets
-                                        await save_tweets(str(user_id), tool_output['tweets'], tweet_type="timeline")
-                                        logger.info(f"Saved {len(tool_output['tweets'])} timeline tweets for user {user_id}")
-                                    elif tool_name == 'search_tweets_tool' and isinstance(tool_output, dict) and 'tweets' in tool_output:
-                                        # Save search tweets
-                                        search_query = tool_input.get('query', 'unknown')
-                                        await save_tweets(str(user_id), tool_output['tweets'], tweet_type=f"search_{search_query}")
-                                        logger.info(f"Saved {len(tool_output['tweets'])} search tweets for user {user_id}")
-                                    elif tool_name == 'post_tweet_tool' and isinstance(tool_output, dict) and 'success' in tool_output and tool_output['success']:
-                                        # Save posted tweet
-                                        tweet_data = {
-                                            'id': tool_output.get('tweet_id', ''),
-                                            'text': tool_output.get('text', tool_input.get('text', ''))
-                                        }
-                                        await save_tweets(str(user_id), [tweet_data], tweet_type="posted")
-                                        logger.info(f"Saved posted tweet for user {user_id}")
-                            
-                            actions_taken.append(ActionTaken(
-                                tool=tool_name,
-                                input=tool_input,
-                                output=tool_output,
-                                success=success
-                            ))
-            
-            # Post-process the result
-            result_output = result.output
             # Make the result serializable if needed
             actions_taken = self._make_serializable(actions_taken)
+            self._remember(session, query, result_output, actions_taken)
             
             return result_output, actions_taken
             
         except Exception as e:
-            logger.error(f"Error running agent: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("Error running agent: %s", e)
             return f"I encountered an error while processing your request: {str(e)}. Please try again.", []
     
+    async def _replay_plan(self, query: str, plan: List[Tuple[str, Dict[str, Any]]], session: Dict):
+        """
+        Run a stored plan's tool calls directly, without asking the model to plan them.
+        """
+        logger.info(f"Replaying plan template: {[name for name, _ in plan]}")
+        tool_calls = await run_plan(session["twitter_api"], plan)
+        
+        pending_saves = []
+        actions = self._process_step(None, tool_calls, session.get("user_id"), pending_saves)
+        if pending_saves:
+            self._save_in_background(pending_saves)
+        
+        if any(action.success for action in actions):
+            response_text = f"Done. I ran the same steps as for your earlier similar request: {', '.join(action.tool for action in actions)}."
+        else:
+            response_text = self._failed_tools_summary(actions)
+        actions = self._make_serializable(actions)
+        self._remember(session, query, response_text, actions)
+        return response_text, actions
+    
+    @staticmethod
+    def _build_response(response_text: Any, actions: List[Dict]) -> AgentResponse:
+        """
+        Build an AgentResponse from serialized actions without re-validating them.
+        
+        FastAPI does not re-validate a response_model instance either; the actions come
+        from _process_step, which already gives them the shapes ActionTaken declares.
+        """
+        return AgentResponse.model_construct(
+            response=str(response_text),
+            actions_taken=[ActionTaken.model_construct(**action) for action in actions]
+        )
+    
+    @staticmethod
+    def _failed_tools_summary(actions: List[ActionTaken]) -> str:
+        """
+        Build the response for a step in which every tool call failed.
+        """
+        errors = "; ".join(
+            f"{action.tool}: {action.output.get('error') or action.output.get('message', 'unknown error')}"
+            for action in actions
+        )
+        return f"I ran the requested tools but all of them failed: {errors}"
+    
+    async def stream_query(self,
+                           query: str,
+                           user_id: Optional[Any] = None,
+                           twitter_user_id: Optional[str] = None,
+                           summarize_on_failure: bool = False) -> AsyncIterator[Union[ActionTaken, AgentResponse]]:
+        """
+        Process a user query, yielding each action as soon as the agent takes it.
+        
+        Args:
+            query: The user's query or instruction.
+            user_id: Optional internal user ID.
+            twitter_user_id: Optional Twitter user ID (preferred for authentication).
+            summarize_on_failure: Keep running the model after a step in which every
+                tool call failed, instead of stopping with a templated error response.
+            
+        Yields:
+            An ActionTaken for every tool call, followed by the final AgentResponse.
+        """
+        logger.info(f"Streaming query: '{query}' for user_id={user_id}, twitter_user_id={twitter_user_id}")
+        
+        actions_taken = []
+        pending_saves = []
+        run_lock = None
+        try:
+            # Get or create user session
+            session = await self._get_user_session(user_id=user_id, twitter_user_id=twitter_user_id)
+            
+            # One run per session at a time: the agent and history are shared by its requests
+            lock = self._run_lock(session)
+            await lock.acquire()
+            run_lock = lock
+            agent = self._get_session_agent(session)
+            session_user_id = session.get("user_id")
+            
+            # smolagents streams steps from a blocking generator; advance it in a worker thread
+            tool_calls = record_tool_calls()
+            steps = agent.run(self._with_history(query, session), stream=True)
+            recorded = 0
+            last_step = None
+            response_text = None
+            while True:
+                step = await asyncio.to_thread(next, steps, _STREAM_DONE)
+                if step is _STREAM_DONE:
+                    break
+                last_step = step
+                # The stream also carries tool-call notices and outputs; only a finished
+                # ActionStep marks the end of the tool calls made in it
+                if not isinstance(step, ActionStep):
+                    continue
+                step_calls, recorded = tool_calls[recorded:], len(tool_calls)
+                step_actions = self._process_step(step, step_calls, session_user_id, pending_saves)
+                for action in step_actions:
+                    actions_taken.append(action)
+                    yield action
+                
+                # Don't pay for another model call just to restate tool errors
+                if step_actions and not summarize_on_failure and not any(action.success for action in step_actions):
+                    steps.close()
+                    response_text = self._failed_tools_summary(step_actions)
+                    break
+            
+            if response_text is None:
+                # smolagents ends the stream with a FinalAnswerStep wrapping the answer
+                response_text = getattr(last_step, 'output', last_step)
+            actions = self._make_serializable(actions_taken)
+            self._remember(session, query, response_text, actions)
+            yield self._build_response(response_text, actions)
+        except Exception as e:
+            logger.exception("Error streaming agent: %s", e)
+            yield self._build_response(
+                f"I encountered an error while processing your request: {str(e)}. Please try again or contact support if the issue persists.",
+                self._make_serializable(actions_taken)
+            )
+        finally:
+            if run_lock is not None:
+                run_lock.release()
+            # Persist tweets in one background bulk write instead of on the response path
+            if pending_saves:
+                self._save_in_background(pending_saves)
+    
     async def process_query(self, 
                            query: str, 
                            user_id: Optional[Any] = None, 
@@ -207,35 +672,61 @@ class TwitterAgent(BaseAgent):
         """
         logger.info(f"Processing query: '{query}' for user_id={user_id}, twitter_user_id={twitter_user_id}")
         
+        loop = asyncio.get_running_loop()
+        
+        # Serve repeated read-only queries from the response cache
+        cache_key = None
+        if self._is_read_only_query(query):
+            cache_key = (self._session_key(user_id, twitter_user_id), query)
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                cached_at, cached_response = cached
+                if loop.time() - cached_at < RESPONSE_CACHE_TTL:
+                    self._response_cache.move_to_end(cache_key)
+                    logger.info(f"Returning cached response for query: '{query}'")
+                    return cached_response
+                del self._response_cache[cache_key]
+        
         try:
             # Get or create user session
             session = await self._get_user_session(user_id=user_id, twitter_user_id=twitter_user_id)
             
-            # Update last used timestamp
-            session["last_used"] = asyncio.get_event_loop().time()
+            # One run per session at a time: the agent and history are shared by its requests
+            async with self._run_lock(session):
+                # Replay the plan of an earlier successful query shaped like this one
+                plan = self._plan_templates.match(query) if PLAN_TEMPLATES else None
+                if plan is not None:
+                    response_text, actions_taken = await self._replay_plan(query, plan, session)
+                else:
+                    # Run the session's agent
+                    response_text, actions_taken = await self._run_agent_with_tools(
+                        query=query,
+                        session=session
+                    )
             
-            # Get the Twitter tools from the session
-            twitter_tools = session["twitter_tools"]
+            logger.info(f"Agent completed with {len(actions_taken)} actions taken")
             
-            # Run the agent with the tools
-            response_text, actions_taken = await self._run_agent_with_tools(
-                query=query, 
-                tools=twitter_tools.create_tools(),
-                session=session
-            )
+            response = self._build_response(response_text, actions_taken)
+            succeeded = bool(actions_taken) and all(action.get("success") for action in actions_taken)
             
-            logger.info(f"Agent completed with {len(actions_taken)} actions taken")
+            # Keep the plans that worked and drop the ones that no longer do
+            if PLAN_TEMPLATES:
+                if succeeded:
+                    self._plan_templates.record(query, actions_taken)
+                elif plan is not None:
+                    self._plan_templates.discard(query)
+            
+            # Cache read-only responses whose tool calls all succeeded
+            if cache_key is not None and succeeded:
+                self._response_cache[cache_key] = (loop.time(), response)
+                if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                    self._response_cache.popitem(last=False)
             
             # Return the agent's response and actions taken
-            return AgentResponse(
-                response=response_text,
-                actions_taken=actions_taken
-            )
+            return response
             
         except Exception as e:
-            logger.error(f"Error running agent: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("Error running agent: %s", e)
             # Return a graceful error response
             return AgentResponse(
                 response=f"I encountered an error while processing your request: {str(e)}. Please try again or contact support if the issue persists.",
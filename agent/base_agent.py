@@ -6,11 +6,12 @@ This module provides the core functionality for the Twitter AI Agent.
 
 import os
 import logging
+import orjson
 from typing import Dict, Any, Optional
+from pydantic import BaseModel
 from smolagents.models import OpenAIServerModel
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class BaseAgent:
@@ -57,8 +58,9 @@ class BaseAgent:
         Returns:
             A JSON-serializable representation of the object
         """
-        import json
-        import copy
+        # Fast path: lists of Pydantic models (e.g. actions taken) dump directly
+        if isinstance(obj, list) and obj and all(isinstance(item, BaseModel) for item in obj):
+            return [item.model_dump(mode="json") for item in obj]
         
         if isinstance(obj, dict):
             return {k: self._make_serializable(v) for k, v in obj.items()}
@@ -70,8 +72,8 @@ class BaseAgent:
             return self._make_serializable(obj.__dict__)
         else:
             try:
-                # Try to convert to a basic type
-                json.dumps(obj)
+                # Try to convert to a basic type (orjson raises TypeError for unsupported values)
+                orjson.dumps(obj)
                 return obj
             except (TypeError, OverflowError):
                 # If it can't be converted, return a string representation
@@ -0,0 +1,121 @@
+"""
+On-disk cache of agent responses for the development scripts.
+
+The manual test scripts send the same queries to the agent run after run. LLMCache
+keeps read-only responses on disk so repeat runs skip the model round trip.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import orjson
+from typing import Dict, Any, Optional, Protocol
+
+from config import DATA_DIR, LLM_CACHE
+from agent.agent import TwitterAgent
+from agent.models import AgentResponse
+from agent.utils import save_json
+
+logger = logging.getLogger(__name__)
+
+# Where cached responses are stored and how long (seconds) they stay fresh
+LLM_CACHE_DIR = os.path.join(DATA_DIR, "llm_cache")
+LLM_CACHE_TTL = 3600
+
+class CacheBackend(Protocol):
+    """Storage for cached responses, keyed by request hash."""
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+    
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        ...
+
+class FileCacheBackend:
+    """
+    Cache backend storing one JSON file per entry.
+    """
+    
+    def __init__(self, directory: str = LLM_CACHE_DIR, ttl: float = LLM_CACHE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached value for a key, or None if it is missing or expired.
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return None
+        
+        if time.time() - entry.get("stored_at", 0) > self.ttl:
+            return None
+        return entry.get("value")
+    
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a value under a key.
+        """
+        save_json({"stored_at": time.time(), "value": value}, self._path(key))
+
+class LLMCache:
+    """
+    Serve repeated read-only agent queries from a cache.
+    
+    Queries that may change Twitter state always reach the agent, and only responses
+    whose tool calls all succeeded are stored.
+    """
+    
+    def __init__(self, backend: Optional[CacheBackend] = None, enabled: bool = LLM_CACHE):
+        self.backend = backend if backend is not None else FileCacheBackend()
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0}
+    
+    @staticmethod
+    def make_key(model: str, query: str, user_id: Optional[Any] = None, twitter_user_id: Optional[str] = None) -> str:
+        """
+        Hash the model, query and user into a cache key.
+        """
+        payload = orjson.dumps({
+            "model": model,
+            "messages": [{"role": "user", "content": query}],
+            "user_id": None if user_id is None else str(user_id),
+            "twitter_user_id": twitter_user_id
+        }, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+    
+    async def process_query(self,
+                            agent: TwitterAgent,
+                            query: str,
+                            user_id: Optional[Any] = None,
+                            twitter_user_id: Optional[str] = None) -> AgentResponse:
+        """
+        Process a query with the agent, serving read-only queries from the cache when possible.
+        """
+        if not self.enabled or not agent._is_read_only_query(query):
+            return await agent.process_query(query=query, user_id=user_id, twitter_user_id=twitter_user_id)
+        
+        key = self.make_key(agent.model_name, query, user_id, twitter_user_id)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return AgentResponse.model_validate(cached)
+        
+        self.stats["misses"] += 1
+        response = await agent.process_query(query=query, user_id=user_id, twitter_user_id=twitter_user_id)
+        # The agent reports errors as ordinary responses, so only keep runs whose tool calls all succeeded
+        if response.actions_taken and all(action.success for action in response.actions_taken):
+            self.backend.set(key, response.model_dump(mode="json"))
+        return response
+    
+    def log_stats(self) -> None:
+        """
+        Log how many queries were served from the cache.
+        """
+        logger.info("LLM cache: %d hits, %d misses", self.stats["hits"], self.stats["misses"])
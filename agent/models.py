@@ -5,16 +5,21 @@ This module contains the Pydantic models used by the Twitter AI Agent.
 """
 
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class ActionTaken(BaseModel):
     """Model for a single action taken by the agent."""
+    # Immutable and closed to unknown fields; instances are shared via the response cache
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    
     tool: str = Field(..., description="The name of the tool that was used")
-    input: Dict[str, Any] = Field(default={}, description="The input parameters provided to the tool")
-    output: Dict[str, Any] = Field(default={}, description="The output returned by the tool")
+    input: Dict[str, Any] = Field(default_factory=dict, description="The input parameters provided to the tool")
+    output: Dict[str, Any] = Field(default_factory=dict, description="The output returned by the tool")
     success: bool = Field(default=True, description="Whether the tool execution was successful")
 
 class AgentResponse(BaseModel):
     """Model for agent response."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    
     response: str = Field(..., description="The text response from the agent")
-    actions_taken: List[ActionTaken] = Field(default=[], description="List of actions taken by the agent")
+    actions_taken: List[ActionTaken] = Field(default_factory=list, description="List of actions taken by the agent")
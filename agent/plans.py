@@ -0,0 +1,162 @@
+"""
+Plan templates for recurring agent queries.
+
+Queries such as 'post a tweet saying "..."' differ only in their quoted text and
+numbers. After a run in which every tool call succeeded and only changed Twitter
+state, its tool calls are stored under the query's skeleton, with the arguments that
+came from the query replaced by slots. A later query with the same skeleton replays
+the tool calls with its own arguments instead of asking the model to plan them again.
+
+Runs that read from Twitter are never stored: their answer is the model's summary of
+what was read, which replaying the tools alone can't give.
+"""
+
+import re
+import inspect
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+
+from twitter.api import TwitterAPI
+from agent import tools
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of stored plan templates
+PLAN_TEMPLATE_CACHE_SIZE = 256
+
+# Write-only tool name -> helper that replays it against a Twitter API client
+TOOL_HELPERS = {
+    "post_tweet_tool": tools.post_tweet,
+    "like_tweet_tool": tools.like_tweet,
+    "unlike_tweet_tool": tools.unlike_tweet,
+    "follow_user_tool": tools.follow_user,
+    "unfollow_user_tool": tools.unfollow_user,
+}
+
+# Double-quoted text and whole numbers are the arguments of a query
+_SLOT_RE = re.compile(r'"([^"]*)"|“([^”]*)”|\b(\d+)\b')
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+# A tool call with arguments to fill: (tool name, {arg: ("slot", index) or ("const", value)})
+PlannedCall = Tuple[str, Dict[str, Tuple[str, Any]]]
+
+def parse_query(query: str) -> Tuple[str, List[Any]]:
+    """
+    Split a query into its skeleton and the argument values it contains.
+    
+    The skeleton is the lowercased, punctuation-stripped query with every argument
+    replaced by a typed placeholder, so queries differing only in arguments share one.
+    """
+    slots = []
+    
+    def replace(match: re.Match) -> str:
+        if match.group(3) is not None:
+            slots.append(int(match.group(3)))
+            return f" num{len(slots) - 1} "
+        slots.append(match.group(1) if match.group(1) is not None else match.group(2))
+        return f" text{len(slots) - 1} "
+    
+    skeleton = _PUNCT_RE.sub(" ", _SLOT_RE.sub(replace, query).lower())
+    return " ".join(skeleton.split()), slots
+
+def _template_arg(value: Any, default: Any, slots: List[Any]) -> Optional[Tuple[str, Any]]:
+    """
+    Return how to fill an argument on replay, or None if it can't be reproduced.
+    
+    An argument only becomes a slot when exactly one of the query's arguments equals it
+    and it isn't the tool's default; otherwise a value the model chose could be bound
+    to an unrelated number in the next query.
+    """
+    if isinstance(value, bool) or value is None or value == default:
+        return ("const", value)
+    matches = [index for index, slot in enumerate(slots) if type(slot) is type(value) and slot == value]
+    if len(matches) == 1:
+        return ("slot", matches[0])
+    # Text the model wrote itself can't be reused for another query
+    if isinstance(value, str):
+        return None
+    return ("const", value)
+
+class PlanTemplates:
+    """
+    LRU store of tool-call plans keyed by query skeleton.
+    """
+    
+    def __init__(self, max_size: int = PLAN_TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self._templates: "OrderedDict[str, List[PlannedCall]]" = OrderedDict()
+    
+    def record(self, query: str, actions: List[Dict]) -> None:
+        """
+        Store the tool calls of a successful run as the plan for queries shaped like this one.
+        
+        Runs using a tool that reads from Twitter or text that doesn't appear in the
+        query are not stored.
+        """
+        skeleton, slots = parse_query(query)
+        plan = []
+        for action in actions:
+            helper = TOOL_HELPERS.get(action.get("tool"))
+            if helper is None:
+                return
+            params = inspect.signature(helper).parameters
+            args = {}
+            for name, value in action.get("input", {}).items():
+                param = params.get(name)
+                default = param.default if param is not None else inspect.Parameter.empty
+                arg = _template_arg(value, default, slots)
+                if arg is None:
+                    return
+                args[name] = arg
+            plan.append((action["tool"], args))
+        
+        if plan:
+            self._templates[skeleton] = plan
+            self._templates.move_to_end(skeleton)
+            if len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+    
+    def match(self, query: str) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        """
+        Return the stored tool calls filled with this query's arguments, or None.
+        """
+        skeleton, slots = parse_query(query)
+        plan = self._templates.get(skeleton)
+        if plan is None:
+            return None
+        self._templates.move_to_end(skeleton)
+        return [
+            (name, {arg: slots[value] if kind == "slot" else value for arg, (kind, value) in args.items()})
+            for name, args in plan
+        ]
+    
+    def discard(self, query: str) -> None:
+        """
+        Forget the plan stored for queries shaped like this one.
+        """
+        self._templates.pop(parse_query(query)[0], None)
+    
+    def clear(self) -> None:
+        """
+        Forget every stored plan.
+        """
+        self._templates.clear()
+
+async def run_plan(twitter_api: TwitterAPI, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Run planned tool calls in order.
+    
+    Returns:
+        The calls in the shape of an agent step's tool_calls, with a failed result
+        in place of any call that raised.
+    """
+    tool_calls = []
+    for name, args in calls:
+        try:
+            output = await TOOL_HELPERS[name](twitter_api, **args)
+        except Exception as e:
+            logger.error(f"Error replaying {name}: {str(e)}")
+            output = {"success": False, "message": str(e)}
+        tool_calls.append({"name": name, "input": args, "output": output})
+    return tool_calls
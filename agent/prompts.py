@@ -5,13 +5,20 @@ This module contains the system prompts that define the behavior
 and capabilities of the Twitter AI Agent.
 """
 
-class AgentPrompts:
-    """Collection of system prompts for the Twitter AI Agent."""
-    
-    @staticmethod
-    def get_twitter_assistant_prompt() -> str:
-        """Get the system prompt for the Twitter AI Agent."""
-        return """You are a helpful Twitter assistant that can perform various Twitter operations. 
+# Instructions to reuse earlier tool results instead of repeating identical calls
+TOOL_REUSE_INSTRUCTIONS = """Check the outputs of previous tool calls in the conversation history before making new tool calls. 
+Extract data from previous tool outputs instead of calling tools again with the same parameters. 
+Only make new calls if the data is unavailable or the parameters differ.
+"""
+
+# Recent requests in the session and their results, sent ahead of the user's request
+PREVIOUS_OBSERVATIONS_TEMPLATE = """Previous observations:
+{history}
+
+Current request: {query}"""
+
+# System prompt for the Twitter AI Agent, built once at import
+TWITTER_ASSISTANT_PROMPT = """You are a helpful Twitter assistant that can perform various Twitter operations. 
 Use the available tools to help the user with their Twitter-related tasks. 
 When searching for tweets, make sure to provide a specific query. 
 When posting tweets, make sure to provide the text content.
@@ -23,9 +30,20 @@ Available operations:
 4. Get user information
 5. Like/unlike tweets
 6. Follow/unfollow users
+7. Search for tweets and post a tweet in one step
 
 When the user asks a question or makes a request:
 1. Determine which Twitter operation is most appropriate
-2. Use the corresponding tool to perform the operation
+2. Use the corresponding tool to perform the operation; if they ask to search and also
+   post a tweet, use the combined search-and-post tool instead of two separate calls
 3. Present the results in a clear, readable format
-"""
+
+""" + TOOL_REUSE_INSTRUCTIONS
+
+class AgentPrompts:
+    """Collection of system prompts for the Twitter AI Agent."""
+    
+    @staticmethod
+    def get_twitter_assistant_prompt() -> str:
+        """Get the system prompt for the Twitter AI Agent."""
+        return TWITTER_ASSISTANT_PROMPT
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query, Body
-from typing import Optional, Dict, Any
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Body, Depends
+from fastapi.responses import StreamingResponse
+from typing import Optional, Dict, Any, AsyncIterator, List
+from pydantic import BaseModel, Field
+import asyncio
+import orjson
 
+from agent import tools
 from agent.agent import TwitterAgent, AgentResponse
 
 class AgentQueryRequest(BaseModel):
@@ -9,14 +13,53 @@ class AgentQueryRequest(BaseModel):
     twitter_user_id: Optional[str] = None
     user_id: Optional[int] = None
 
+class ToolCall(BaseModel):
+    tool: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+
+class BulkToolRequest(BaseModel):
+    calls: List[ToolCall]
+    twitter_user_id: Optional[str] = None
+    user_id: Optional[int] = None
+
+# Tool name -> helper for the bulk endpoint; each helper takes the client first
+DISPATCH = {
+    "post_tweet": tools.post_tweet,
+    "get_user_timeline": tools.get_user_timeline,
+    "search_tweets": tools.search_tweets,
+    "get_user_info": tools.get_user_info,
+    "like_tweet": tools.like_tweet,
+    "unlike_tweet": tools.unlike_tweet,
+    "follow_user": tools.follow_user,
+    "unfollow_user": tools.unfollow_user,
+    "bulk_fetch": tools.bulk_fetch,
+    "search_and_post": tools.search_and_post,
+}
+
 # Create router
 agent_router = APIRouter()
 
+# Process-wide agent, created on first use and shared by all requests
+_agent: Optional[TwitterAgent] = None
+
+def get_agent() -> TwitterAgent:
+    """
+    Return the shared TwitterAgent, creating it on first use.
+    """
+    global _agent
+    if _agent is None:
+        try:
+            _agent = TwitterAgent()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Agent processing error: {str(e)}")
+    return _agent
+
 @agent_router.post("/process", response_model=AgentResponse)
 async def process_agent_query(
     query: str = Body(..., description="The query to process"),
     user_id: Optional[int] = Query(None, description="Internal user ID"),
-    twitter_user_id: Optional[str] = Query(None, description="Twitter user ID")
+    twitter_user_id: Optional[str] = Query(None, description="Twitter user ID"),
+    agent: TwitterAgent = Depends(get_agent)
 ):
     """
     Process a query with the Twitter AI agent.
@@ -27,13 +70,12 @@ async def process_agent_query(
         raise HTTPException(status_code=400, detail="Either user_id or twitter_user_id must be provided")
     
     try:
-        agent = TwitterAgent()
         return await agent.process_query(query=query, user_id=user_id, twitter_user_id=twitter_user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent processing error: {str(e)}")
 
 @agent_router.post("/query", response_model=AgentResponse)
-async def process_agent_query_json(request: AgentQueryRequest):
+async def process_agent_query_json(request: AgentQueryRequest, agent: TwitterAgent = Depends(get_agent)):
     """
     Process a query with the Twitter AI agent using a JSON request body.
     
@@ -43,11 +85,72 @@ async def process_agent_query_json(request: AgentQueryRequest):
         raise HTTPException(status_code=400, detail="Either user_id or twitter_user_id must be provided")
     
     try:
-        agent = TwitterAgent()
         return await agent.process_query(query=request.query, user_id=request.user_id, twitter_user_id=request.twitter_user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent processing error: {str(e)}")
 
+async def _sse_events(agent: TwitterAgent, request: AgentQueryRequest) -> AsyncIterator[bytes]:
+    """
+    Frame the agent's streamed actions and final response as server-sent events.
+    """
+    async for item in agent.stream_query(query=request.query, user_id=request.user_id, twitter_user_id=request.twitter_user_id):
+        event = b"response" if isinstance(item, AgentResponse) else b"action"
+        yield b"event: " + event + b"\ndata: " + orjson.dumps(item.model_dump(), default=str) + b"\n\n"
+
+@agent_router.post("/stream")
+async def stream_agent_query(request: AgentQueryRequest, agent: TwitterAgent = Depends(get_agent)):
+    """
+    Process a query with the Twitter AI agent, streaming the result as server-sent events.
+    
+    Each action is sent as an "action" event as soon as the agent takes it, followed by
+    a final "response" event carrying the full AgentResponse.
+    """
+    if not request.user_id and not request.twitter_user_id:
+        raise HTTPException(status_code=400, detail="Either user_id or twitter_user_id must be provided")
+    
+    return StreamingResponse(_sse_events(agent, request), media_type="text/event-stream")
+
+async def _dispatch(twitter_api: Any, call: ToolCall) -> Dict[str, Any]:
+    """
+    Run one bulk tool call; bad arguments then fail this call rather than the batch.
+    """
+    return await DISPATCH[call.tool](twitter_api, **call.args)
+
+@agent_router.post("/bulk")
+async def bulk_tool_calls(request: BulkToolRequest):
+    """
+    Run several Twitter tool calls in one request.
+    
+    The calls run concurrently and their results are returned in request order. A call
+    that raises is reported as a failed result instead of failing the whole batch.
+    """
+    if not request.user_id and not request.twitter_user_id:
+        raise HTTPException(status_code=400, detail="Either user_id or twitter_user_id must be provided")
+    
+    unknown = sorted({call.tool for call in request.calls if call.tool not in DISPATCH})
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown tools: {', '.join(unknown)}")
+    
+    try:
+        # Reuse the user's session client; no agent or model is needed to dispatch tools
+        twitter_api = await TwitterAgent.get_twitter_api(user_id=request.user_id, twitter_user_id=request.twitter_user_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to initialize Twitter client: {str(e)}")
+    
+    results = await asyncio.gather(
+        *(_dispatch(twitter_api, call) for call in request.calls),
+        return_exceptions=True
+    )
+    
+    return {
+        "results": [
+            {"success": False, "message": f"{call.tool} failed: {str(result)}"} if isinstance(result, Exception) else result
+            for call, result in zip(request.calls, results)
+        ]
+    }
+
 @agent_router.get("/")
 async def agent_info():
     """
@@ -57,7 +160,10 @@ async def agent_info():
         "name": "Twitter Agent API",
         "description": "API for interacting with Twitter using AI agent",
         "endpoints": [
-            "/agent/process"
+            "/agent/process",
+            "/agent/query",
+            "/agent/stream",
+            "/agent/bulk"
         ],
         "usage": "POST /agent/process with query parameter and either user_id or twitter_user_id"
     }
@@ -1,13 +1,37 @@
 import json
+import asyncio
 import logging
+from contextvars import ContextVar
 from typing import Dict, List, Any, Optional, Callable, Awaitable
 from smolagents import tool
 from twitter.api import TwitterAPI
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Twitter API client the agent tools act on, bound per task by TwitterTools.bind()
+_twitter_api_ctx: ContextVar[TwitterAPI] = ContextVar("twitter_api")
+
+# Tool calls made in the current context while an agent runs, started by record_tool_calls()
+_tool_calls_ctx: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("tool_calls", default=None)
+
+# Tools shared by every TwitterTools instance, built on first use
+_tools: Optional[List[Callable[..., Awaitable[Dict[str, Any]]]]] = None
+
+def _format_tweet(tweet: Dict[str, Any], _get=dict.get) -> Dict[str, Any]:
+    """Reduce a serialized tweet to the fields shown to the agent."""
+    author = _get(tweet, "author") or {}
+    return {
+        "id": _get(tweet, "id", ""),
+        "text": _get(tweet, "text", ""),
+        "author": _get(author, "username", "Unknown"),
+        "created_at": _get(tweet, "created_at", "")
+    }
+
+def _format_tweets(tweets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reduce serialized tweets to the fields shown to the agent."""
+    return [_format_tweet(tweet) for tweet in tweets]
+
 async def post_tweet(twitter_api: TwitterAPI, text: str, reply_to_id: Optional[str] = None) -> Dict[str, Any]:
     """Post a new tweet to Twitter. Use this when the user wants to post content to their Twitter account.
     
@@ -28,7 +52,7 @@ async def post_tweet(twitter_api: TwitterAPI, text: str, reply_to_id: Optional[s
             "text": result.get('text', '')
         }
     except Exception as e:
-        logger.error(f"Error posting tweet: {str(e)}")
+        logger.error("Error posting tweet: %s", e)
         return {
             "success": False,
             "message": f"Failed to post tweet: {str(e)}"
@@ -54,14 +78,7 @@ async def get_user_timeline(twitter_api: TwitterAPI, limit: int = 10) -> Dict[st
                 "tweets": []
             }
             
-        formatted_tweets = []
-        for tweet in tweets:
-            formatted_tweets.append({
-                "id": tweet.get("id", ""),
-                "text": tweet.get("text", ""),
-                "author": tweet.get("author", {}).get("username", "Unknown"),
-                "created_at": tweet.get("created_at", "")
-            })
+        formatted_tweets = _format_tweets(tweets)
             
         return {
             "success": True,
@@ -69,7 +86,7 @@ async def get_user_timeline(twitter_api: TwitterAPI, limit: int = 10) -> Dict[st
             "tweets": formatted_tweets
         }
     except Exception as e:
-        logger.error(f"Error getting timeline: {str(e)}")
+        logger.error("Error getting timeline: %s", e)
         return {
             "success": False,
             "message": f"Failed to get timeline: {str(e)}"
@@ -97,14 +114,7 @@ async def search_tweets(twitter_api: TwitterAPI, query: str, limit: int = 10) ->
                 "tweets": []
             }
             
-        formatted_tweets = []
-        for tweet in tweets:
-            formatted_tweets.append({
-                "id": tweet.get("id", ""),
-                "text": tweet.get("text", ""),
-                "author": tweet.get("author", {}).get("username", "Unknown"),
-                "created_at": tweet.get("created_at", "")
-            })
+        formatted_tweets = _format_tweets(tweets)
             
         return {
             "success": True,
@@ -112,7 +122,7 @@ async def search_tweets(twitter_api: TwitterAPI, query: str, limit: int = 10) ->
             "tweets": formatted_tweets
         }
     except Exception as e:
-        logger.error(f"Error searching tweets: {str(e)}")
+        logger.error("Error searching tweets: %s", e)
         return {
             "success": False,
             "message": f"Failed to search tweets: {str(e)}"
@@ -144,7 +154,7 @@ async def get_user_info(twitter_api: TwitterAPI) -> Dict[str, Any]:
             }
         }
     except Exception as e:
-        logger.error(f"Error getting user info: {str(e)}")
+        logger.error("Error getting user info: %s", e)
         return {
             "success": False,
             "message": f"Failed to get user info: {str(e)}"
@@ -169,7 +179,7 @@ async def like_tweet(twitter_api: TwitterAPI, tweet_id: str) -> Dict[str, Any]:
             "tweet_id": tweet_id
         }
     except Exception as e:
-        logger.error(f"Error liking tweet: {str(e)}")
+        logger.error("Error liking tweet: %s", e)
         return {
             "success": False,
             "message": f"Failed to like tweet: {str(e)}"
@@ -194,7 +204,7 @@ async def unlike_tweet(twitter_api: TwitterAPI, tweet_id: str) -> Dict[str, Any]
             "tweet_id": tweet_id
         }
     except Exception as e:
-        logger.error(f"Error unliking tweet: {str(e)}")
+        logger.error("Error unliking tweet: %s", e)
         return {
             "success": False,
             "message": f"Failed to unlike tweet: {str(e)}"
@@ -219,7 +229,7 @@ async def follow_user(twitter_api: TwitterAPI, target_user_id: str) -> Dict[str,
             "target_user_id": target_user_id
         }
     except Exception as e:
-        logger.error(f"Error following user: {str(e)}")
+        logger.error("Error following user: %s", e)
         return {
             "success": False,
             "message": f"Failed to follow user: {str(e)}"
@@ -244,13 +254,260 @@ async def unfollow_user(twitter_api: TwitterAPI, target_user_id: str) -> Dict[st
             "target_user_id": target_user_id
         }
     except Exception as e:
-        logger.error(f"Error unfollowing user: {str(e)}")
+        logger.error("Error unfollowing user: %s", e)
         return {
             "success": False,
             "message": f"Failed to unfollow user: {str(e)}"
         }
 
 
+async def bulk_fetch(twitter_api: TwitterAPI, timeline_limit: int = 10, search_query: Optional[str] = None,
+                     search_limit: int = 10, include_user_info: bool = True) -> Dict[str, Any]:
+    """Fetch the timeline, search results and user profile in one step. Use this when the user wants several of these at once.
+    
+    Args:
+        twitter_api: The Twitter API client instance.
+        timeline_limit: Maximum number of timeline tweets to retrieve.
+        search_query: Optional search query or keyword; no search is run without one.
+        search_limit: Maximum number of search results to retrieve.
+        include_user_info: Whether to include the user's profile information.
+        
+    Returns:
+        A dictionary with the result of each fetch keyed by name.
+    """
+    # The calls are independent, so run them concurrently; TwitterAPI's shared
+    # semaphore still caps how many requests are in flight
+    calls = {"timeline": get_user_timeline(twitter_api, timeline_limit)}
+    if search_query:
+        calls["search"] = search_tweets(twitter_api, search_query, search_limit)
+    if include_user_info:
+        calls["user_info"] = get_user_info(twitter_api)
+    
+    results = dict(zip(calls, await asyncio.gather(*calls.values())))
+    failed = [name for name, result in results.items() if not result.get("success")]
+    
+    return {
+        "success": not failed,
+        "message": f"Failed to fetch: {', '.join(failed)}" if failed else f"Fetched {', '.join(results)}.",
+        **results
+    }
+
+
+async def search_and_post(twitter_api: TwitterAPI, query: str, post_text: str, limit: int = 10) -> Dict[str, Any]:
+    """Search for tweets and post a new tweet in one step. Use this when the user asks for both a search and a new tweet.
+    
+    Args:
+        twitter_api: The Twitter API client instance.
+        query: The search query or keyword.
+        post_text: The text content of the tweet to post.
+        limit: Maximum number of tweets to retrieve.
+        
+    Returns:
+        A dictionary with the search and post results.
+    """
+    # The tweet doesn't depend on the search results, so both run at once
+    search, post = await asyncio.gather(
+        search_tweets(twitter_api, query, limit),
+        post_tweet(twitter_api, post_text)
+    )
+    
+    return {
+        "success": search["success"] and post["success"],
+        "message": f"{search['message']} {post['message']}",
+        "search": search,
+        "post": post
+    }
+
+
+def record_tool_calls() -> List[Dict[str, Any]]:
+    """
+    Start recording the agent tool calls made in the current context.
+    
+    A CodeAgent only records the python code it ran, not the tools that code called, so
+    the tools record themselves. Worker threads started from this context record into
+    the same list.
+    
+    Returns:
+        The list each call is appended to as a {"name", "input", "output"} dict.
+    """
+    calls = []
+    _tool_calls_ctx.set(calls)
+    return calls
+
+async def _call_tool(name: str, helper: Callable[..., Awaitable[Dict[str, Any]]], **inputs: Any) -> Dict[str, Any]:
+    """Run a tool's helper on the bound client, recording the call if recording is on."""
+    output = await helper(_twitter_api_ctx.get(), **inputs)
+    calls = _tool_calls_ctx.get()
+    if calls is not None:
+        calls.append({"name": name, "input": inputs, "output": output})
+    return output
+
+def _build_tools() -> List[Callable[..., Awaitable[Dict[str, Any]]]]:
+    """
+    Build the agent's tools, which act on the Twitter API client bound to the current context.
+    
+    Returns:
+        List of tool functions that can be used by the agent.
+    """
+    @tool
+    async def post_tweet_tool(text: str, reply_to_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Post a new tweet to Twitter. Use this when the user wants to post content to their Twitter account.
+        
+        Args:
+            text: The text content of the tweet.
+            reply_to_id: Optional ID of a tweet to reply to.
+        
+        Returns:
+            A dictionary with the result of the operation.
+        """
+        return await _call_tool("post_tweet_tool", post_tweet, text=text, reply_to_id=reply_to_id)
+    
+    @tool
+    async def get_timeline_tool(limit: int = 10) -> Dict[str, Any]:
+        """
+        Get the user's Twitter timeline. Use this when the user wants to see their recent tweets or activity.
+        
+        Args:
+            limit: Maximum number of tweets to retrieve.
+        
+        Returns:
+            A dictionary with the timeline tweets and metadata.
+        """
+        return await _call_tool("get_timeline_tool", get_user_timeline, limit=limit)
+    
+    @tool
+    async def search_tweets_tool(query: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Search for tweets using a keyword or hashtag. Use this when the user wants to find tweets about a specific topic.
+        
+        Args:
+            query: The search query or keyword.
+            limit: Maximum number of tweets to retrieve.
+        
+        Returns:
+            A dictionary with the search results and metadata.
+        """
+        return await _call_tool("search_tweets_tool", search_tweets, query=query, limit=limit)
+    
+    @tool
+    async def get_user_info_tool() -> Dict[str, Any]:
+        """
+        Get information about the authenticated user. Use this when the user wants to know about their Twitter profile.
+        
+        Returns:
+            A dictionary with the user's profile information.
+        """
+        return await _call_tool("get_user_info_tool", get_user_info)
+    
+    @tool
+    async def like_tweet_tool(tweet_id: str) -> Dict[str, Any]:
+        """
+        Like a tweet on Twitter. Use this when the user wants to like a specific tweet.
+        
+        Args:
+            tweet_id: The ID of the tweet to like.
+        
+        Returns:
+            A dictionary with the result of the operation.
+        """
+        return await _call_tool("like_tweet_tool", like_tweet, tweet_id=tweet_id)
+    
+    @tool
+    async def unlike_tweet_tool(tweet_id: str) -> Dict[str, Any]:
+        """
+        Unlike a tweet on Twitter. Use this when the user wants to unlike a specific tweet.
+        
+        Args:
+            tweet_id: The ID of the tweet to unlike.
+        
+        Returns:
+            A dictionary with the result of the operation.
+        """
+        return await _call_tool("unlike_tweet_tool", unlike_tweet, tweet_id=tweet_id)
+    
+    @tool
+    async def follow_user_tool(target_user_id: str) -> Dict[str, Any]:
+        """
+        Follow a user on Twitter. Use this when the user wants to follow another Twitter user.
+        
+        Args:
+            target_user_id: The ID of the user to follow.
+        
+        Returns:
+            A dictionary with the result of the operation.
+        """
+        return await _call_tool("follow_user_tool", follow_user, target_user_id=target_user_id)
+    
+    @tool
+    async def unfollow_user_tool(target_user_id: str) -> Dict[str, Any]:
+        """
+        Unfollow a user on Twitter. Use this when the user wants to unfollow another Twitter user.
+        
+        Args:
+            target_user_id: The ID of the user to unfollow.
+        
+        Returns:
+            A dictionary with the result of the operation.
+        """
+        return await _call_tool("unfollow_user_tool", unfollow_user, target_user_id=target_user_id)
+    
+    @tool
+    async def bulk_fetch_tool(timeline_limit: int = 10, search_query: Optional[str] = None,
+                              search_limit: int = 10, include_user_info: bool = True) -> Dict[str, Any]:
+        """
+        Fetch the timeline, search results and user profile in one step. Use this when the user wants several of these at once.
+        
+        Args:
+            timeline_limit: Maximum number of timeline tweets to retrieve.
+            search_query: Optional search query or keyword; no search is run without one.
+            search_limit: Maximum number of search results to retrieve.
+            include_user_info: Whether to include the user's profile information.
+        
+        Returns:
+            A dictionary with the result of each fetch keyed by name.
+        """
+        return await _call_tool("bulk_fetch_tool", bulk_fetch, timeline_limit=timeline_limit, search_query=search_query,
+                                search_limit=search_limit, include_user_info=include_user_info)
+    
+    @tool
+    async def search_and_post_tool(query: str, post_text: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Search for tweets and post a new tweet in one step. Use this when the user asks for both a search and a new tweet.
+        
+        Args:
+            query: The search query or keyword.
+            post_text: The text content of the tweet to post.
+            limit: Maximum number of tweets to retrieve.
+        
+        Returns:
+            A dictionary with the search and post results.
+        """
+        return await _call_tool("search_and_post_tool", search_and_post, query=query, post_text=post_text, limit=limit)
+    
+    return [
+        post_tweet_tool,
+        get_timeline_tool,
+        search_tweets_tool,
+        get_user_info_tool,
+        like_tweet_tool,
+        unlike_tweet_tool,
+        follow_user_tool,
+        unfollow_user_tool,
+        bulk_fetch_tool,
+        search_and_post_tool
+    ]
+
+def _get_tools() -> List[Callable[..., Awaitable[Dict[str, Any]]]]:
+    """
+    Get the shared agent tools, building them (and their schemas) once per process.
+    """
+    global _tools
+    if _tools is None:
+        _tools = _build_tools()
+    return _tools
+
+
 class TwitterTools:
     """Collection of Twitter API tools for the AI agent."""
     
@@ -262,130 +519,31 @@ class TwitterTools:
             twitter_api: The Twitter API client instance.
         """
         self.twitter_api = twitter_api
-        logger.info(f"Initialized TwitterTools for user_id={twitter_api.user_id}, twitter_user_id={twitter_api.twitter_user_id}")
+        logger.info("Initialized TwitterTools for user_id=%s, twitter_user_id=%s", twitter_api.user_id, twitter_api.twitter_user_id)
+    
+    def bind(self) -> None:
+        """
+        Make the tools act on this instance's Twitter API client in the current context.
+        
+        Contexts are per task and copied into worker threads, so concurrent agent runs
+        for different users each see their own client.
+        """
+        _twitter_api_ctx.set(self.twitter_api)
     
     def create_tools(self) -> List[Callable[..., Awaitable[Dict[str, Any]]]]:
         """
         Create and return the list of tools that the agent can use.
         
+        The tools (and the schemas smolagents derives from them) are built once
+        per process and shared; this also binds them to this instance's client
+        in the current context.
+        
         Returns:
             List of tool functions that can be used by the agent.
         """
-        @tool
-        async def post_tweet_tool(text: str, reply_to_id: Optional[str] = None) -> Dict[str, Any]:
-            """
-            Post a new tweet to Twitter. Use this when the user wants to post content to their Twitter account.
-            
-            Args:
-                text: The text content of the tweet.
-                reply_to_id: Optional ID of a tweet to reply to.
-                
-            Returns:
-                A dictionary with the result of the operation.
-            """
-            return await post_tweet(self.twitter_api, text, reply_to_id)
-        
-        @tool
-        async def get_timeline_tool(limit: int = 10) -> Dict[str, Any]:
-            """
-            Get the user's Twitter timeline. Use this when the user wants to see their recent tweets or activity.
-            
-            Args:
-                limit: Maximum number of tweets to retrieve.
-                
-            Returns:
-                A dictionary with the timeline tweets and metadata.
-            """
-            return await get_user_timeline(self.twitter_api, limit)
-        
-        @tool
-        async def search_tweets_tool(query: str, limit: int = 10) -> Dict[str, Any]:
-            """
-            Search for tweets using a keyword or hashtag. Use this when the user wants to find tweets about a specific topic.
-            
-            Args:
-                query: The search query or keyword.
-                limit: Maximum number of tweets to retrieve.
-                
-            Returns:
-                A dictionary with the search results and metadata.
-            """
-            return await search_tweets(self.twitter_api, query, limit)
-        
-        @tool
-        async def get_user_info_tool() -> Dict[str, Any]:
-            """
-            Get information about the authenticated user. Use this when the user wants to know about their Twitter profile.
-            
-            Returns:
-                A dictionary with the user's profile information.
-            """
-            return await get_user_info(self.twitter_api)
-        
-        @tool
-        async def like_tweet_tool(tweet_id: str) -> Dict[str, Any]:
-            """
-            Like a tweet on Twitter. Use this when the user wants to like a specific tweet.
-            
-            Args:
-                tweet_id: The ID of the tweet to like.
-                
-            Returns:
-                A dictionary with the result of the operation.
-            """
-            return await like_tweet(self.twitter_api, tweet_id)
-        
-        @tool
-        async def unlike_tweet_tool(tweet_id: str) -> Dict[str, Any]:
-            """
-            Unlike a tweet on Twitter. Use this when the user wants to unlike a specific tweet.
-            
-            Args:
-                tweet_id: The ID of the tweet to unlike.
-                
-            Returns:
-                A dictionary with the result of the operation.
-            """
-            return await unlike_tweet(self.twitter_api, tweet_id)
-        
-        @tool
-        async def follow_user_tool(target_user_id: str) -> Dict[str, Any]:
-            """
-            Follow a user on Twitter. Use this when the user wants to follow another Twitter user.
-            
-            Args:
-                target_user_id: The ID of the user to follow.
-                
-            Returns:
-                A dictionary with the result of the operation.
-            """
-            return await follow_user(self.twitter_api, target_user_id)
-        
-        @tool
-        async def unfollow_user_tool(target_user_id: str) -> Dict[str, Any]:
-            """
-            Unfollow a user on Twitter. Use this when the user wants to unfollow another Twitter user.
-            
-            Args:
-                target_user_id: The ID of the user to unfollow.
-                
-            Returns:
-                A dictionary with the result of the operation.
-            """
-            return await unfollow_user(self.twitter_api, target_user_id)
-        
-        # Return the list of tools
-        return [
-            post_tweet_tool,
-            get_timeline_tool,
-            search_tweets_tool,
-            get_user_info_tool,
-            like_tweet_tool,
-            unlike_tweet_tool,
-            follow_user_tool,
-            unfollow_user_tool
-        ]
-        
+        self.bind()
+        return _get_tools()
+    
     def get_tools(self) -> List[Callable[..., Awaitable[Dict[str, Any]]]]:
         """
         Get all Twitter tools bound to the current Twitter API instance.
@@ -395,3 +553,15 @@ class TwitterTools:
             List of tool functions that can be used by the agent.
         """
         return self.create_tools()
+    
+    async def close(self) -> None:
+        """
+        Release the Twitter API client's resources once the tools are no longer needed.
+        """
+        await self.twitter_api.close()
+    
+    async def __aenter__(self) -> "TwitterTools":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
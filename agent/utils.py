@@ -7,11 +7,15 @@ This module provides helper functions for the Twitter Agent implementation.
 import os
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import orjson
+from typing import Dict, Any, List, Optional, Set
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Directories save_json has already created (or found) on disk
+_ensured_dirs: Set[str] = set()
+
 def generate_timestamped_filename(prefix: str, extension: str) -> str:
     """
     Generate a filename with a timestamp.
@@ -26,6 +30,35 @@ def generate_timestamped_filename(prefix: str, extension: str) -> str:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     return f"{prefix}_{timestamp}.{extension}"
 
+def _default(obj: Any) -> Any:
+    """
+    Convert a value orjson can't serialize natively.
+    
+    Args:
+        obj: The unsupported value
+        
+    Returns:
+        A value orjson can serialize (it calls this hook again for nested values)
+    """
+    if hasattr(obj, 'to_dict') and callable(getattr(obj, 'to_dict')):
+        return obj.to_dict()
+    elif hasattr(obj, '__dict__'):
+        return obj.__dict__
+    # If it can't be converted, return a string representation
+    return str(obj)
+
+def _dumps(obj: Any, option: int = 0) -> bytes:
+    """
+    Serialize an object with orjson, converting unsupported values on the fly.
+    
+    Falls back to the stdlib json module for integers beyond 64 bits, which orjson rejects.
+    """
+    try:
+        return orjson.dumps(obj, default=_default, option=option | orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        indent = 2 if option & orjson.OPT_INDENT_2 else None
+        return json.dumps(obj, default=_default, indent=indent, ensure_ascii=False).encode()
+
 def make_serializable(obj: Any) -> Any:
     """
     Convert an object to a JSON-serializable format.
@@ -36,22 +69,12 @@ def make_serializable(obj: Any) -> Any:
     Returns:
         A JSON-serializable representation of the object
     """
-    if isinstance(obj, dict):
-        return {k: make_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [make_serializable(item) for item in obj]
-    elif hasattr(obj, 'to_dict') and callable(getattr(obj, 'to_dict')):
-        return make_serializable(obj.to_dict())
-    elif hasattr(obj, '__dict__'):
-        return make_serializable(obj.__dict__)
-    else:
-        try:
-            # Try to convert to a basic type
-            json.dumps(obj)
-            return obj
-        except (TypeError, OverflowError):
-            # If it can't be converted, return a string representation
-            return str(obj)
+    try:
+        payload = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        # orjson rejects integers beyond 64 bits (and would read them back as floats)
+        return json.loads(json.dumps(obj, default=_default))
+    return orjson.loads(payload)
 
 def save_json(data: Any, filepath: str) -> bool:
     """
@@ -65,15 +88,21 @@ def save_json(data: Any, filepath: str) -> bool:
         True if successful, False otherwise
     """
     try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        # Create directory if it doesn't exist, checking the disk only once per directory
+        directory = os.path.dirname(filepath)
+        if directory and directory not in _ensured_dirs:
+            os.makedirs(directory, exist_ok=True)
+            _ensured_dirs.add(directory)
         
-        # Convert data to JSON-serializable format
-        serializable_data = make_serializable(data)
+        # Serialize in one pass; orjson emits UTF-8 bytes and only calls
+        # _default for the values it can't handle itself
+        payload = _dumps(data, orjson.OPT_INDENT_2)
         
-        # Write to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(serializable_data, f, indent=2, ensure_ascii=False)
+        # Write to a temporary file and swap it in, so readers never see a partial file
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, filepath)
         
         logger.info(f"Data saved to {filepath}")
         return True
@@ -1,18 +1,43 @@
 import uvicorn
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import os
 
 from config import HOST, PORT, DEBUG
 from database.db import init_db
 from auth.routes import auth_router
+from auth.oauth import close_oauth_handler
 from twitter.routes import twitter_router
 from agent.routes import agent_router
+from agent.agent import TwitterAgent
+
+# Configure logging once for the whole application
+logging.basicConfig(level=logging.INFO)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Initialize database and start session cleanup on startup; stop cleanup and
+    close sessions, pooled connections and OAuth sessions on shutdown
+    """
+    await init_db()
+    TwitterAgent.start_session_cleanup()
+    try:
+        yield
+    finally:
+        await TwitterAgent.stop_session_cleanup()
+        await TwitterAgent.close_sessions()
+        close_oauth_handler()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Twitter Agent V2",
     description="A Twitter agent application that uses Tweepy with OAuth 2.0 for multi-user authentication",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Include routers
@@ -38,13 +63,6 @@ async def root():
         ]
     }
 
-@app.on_event("startup")
-async def startup():
-    """
-    Initialize database on startup
-    """
-    await init_db()
-
 if __name__ == "__main__":
     # Ensure data directory exists for JSON storage
     os.makedirs("data", exist_ok=True)
@@ -1,4 +1,8 @@
 import tweepy
+import requests
+import asyncio
+import logging
+from collections import OrderedDict
 from fastapi import HTTPException
 from datetime import datetime, timedelta
 import os
@@ -12,35 +16,77 @@ from config import TWITTER_CLIENT_ID, TWITTER_CLIENT_SECRET, TWITTER_CALLBACK_UR
 from database.db import get_token_by_twitter_user_id, create_user, create_token, update_token, get_user
 from database.models import User, TwitterToken
 
+logger = logging.getLogger(__name__)
+
 # For development only - disable HTTPS requirement
 # WARNING: This should NEVER be used in production
 if DEBUG:
     os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
+# Maximum number of cached logins and how long (seconds) they stay fresh
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 300
+
+# LRU cache of saved logins: twitter_user_id -> (timestamp, user, token)
+_token_cache: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]], Dict[str, Any]]]" = OrderedDict()
+# Per-user locks so concurrent logins for one account don't race on the cache, and how
+# many logins hold or wait on each; a lock is dropped once none do
+_token_locks: Dict[str, asyncio.Lock] = {}
+_token_lock_users: Dict[str, int] = {}
+
+def _get_cached_login(twitter_user_id: str) -> Optional[Tuple[Optional[Dict[str, Any]], Dict[str, Any]]]:
+    """
+    Return the cached (user, token) for a Twitter user if it is still fresh
+    """
+    cached = _token_cache.get(twitter_user_id)
+    if cached is None:
+        return None
+    cached_at, user, token = cached
+    if asyncio.get_running_loop().time() - cached_at >= TOKEN_CACHE_TTL:
+        del _token_cache[twitter_user_id]
+        return None
+    _token_cache.move_to_end(twitter_user_id)
+    return user, token
+
+def _cache_login(twitter_user_id: str, user: Optional[Dict[str, Any]], token: Dict[str, Any]) -> None:
+    """
+    Store the (user, token) saved for a Twitter user, evicting the oldest entry when full
+    """
+    _token_cache[twitter_user_id] = (asyncio.get_running_loop().time(), user, token)
+    _token_cache.move_to_end(twitter_user_id)
+    if len(_token_cache) > TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+
+def invalidate_cached_login(twitter_user_id: str) -> None:
+    """
+    Drop the cached login for a Twitter user after its token changes elsewhere
+    """
+    _token_cache.pop(str(twitter_user_id), None)
+
 class OAuth2Handler:
     """
     Handler for Twitter OAuth 2.0 authentication with PKCE
     """
     def __init__(self):
-        # Hardcode the values directly to ensure consistency
-        self.client_id = "NkNaZGFqeF91NDZBQlpqRFhrV1k6MTpjaQ"  # Hardcoded from .env
-        self.client_secret = "-_9G0PyCNVj43aBQYcNPIQHcziQePBylL1dTa0u78bBT9dNNFZ"  # Hardcoded from .env
-        self.redirect_uri = "http://localhost:8000/oauth/callback"  # Hardcoded
-        self.scopes = ["tweet.read", "tweet.write", "users.read", "follows.read", 
-                      "follows.write", "like.read", "like.write", "offline.access"]
+        # Credentials and callback come from the environment via config
+        self.client_id = TWITTER_CLIENT_ID
+        self.client_secret = TWITTER_CLIENT_SECRET
+        self.redirect_uri = TWITTER_CALLBACK_URL
+        self.scopes = TWITTER_SCOPES
         
-        # Print the values for debugging
-        print(f"DEBUG - Client ID: {self.client_id}")
-        print(f"DEBUG - Callback URL: {self.redirect_uri}")
-        print(f"DEBUG - Scopes: {self.scopes}")
+        logger.debug("OAuth client ID: %s, callback URL: %s, scopes: %s", self.client_id, self.redirect_uri, self.scopes)
         
-        # Initialize OAuth 2.0 handler with hardcoded values
+        # Initialize OAuth 2.0 handler
         self.oauth2_handler = tweepy.OAuth2UserHandler(
             client_id=self.client_id,
             redirect_uri=self.redirect_uri,
             scope=self.scopes,
             client_secret=self.client_secret
         )
+        
+        # Keep-alive session for the API calls made while logging users in;
+        # the token exchange reuses oauth2_handler, which is itself a session
+        self.http = requests.Session()
     
     def get_authorization_url(self) -> str:
         """
@@ -55,8 +101,7 @@ class OAuth2Handler:
         # Let Tweepy handle the PKCE flow
         auth_url = self.oauth2_handler.get_authorization_url()
         
-        print("DEBUG - Authorization URL:")
-        print(auth_url)
+        logger.debug("Authorization URL: %s", auth_url)
         
         return auth_url
     
@@ -69,17 +114,19 @@ class OAuth2Handler:
         """
         try:
             # Let Tweepy handle the token exchange
-            print("DEBUG - Exchanging code for token")
-            token_data = self.oauth2_handler.fetch_token(authorization_response)
+            logger.debug("Exchanging code for token")
+            # Tweepy's OAuth handler and client block on requests, so run them in worker threads
+            token_data = await asyncio.to_thread(self.oauth2_handler.fetch_token, authorization_response)
             
             # Create client with the access token
             # For OAuth 2.0 User Context, we should use the access token as the bearer token
             client = tweepy.Client(
                 bearer_token=token_data['access_token']
             )
+            client.session = self.http
             
             # Get user information
-            user_info = client.get_me(user_auth=False)
+            user_info = await asyncio.to_thread(client.get_me, user_auth=False)
             twitter_user_id = user_info.data.id
             twitter_username = user_info.data.username
             
@@ -89,7 +136,7 @@ class OAuth2Handler:
             return {
                 "access_token": token_data['access_token'],
                 "refresh_token": token_data.get('refresh_token'),
-                "expires_at": expires_at,  # The DateTimeEncoder will handle this
+                "expires_at": expires_at,  # Serialized as ISO 8601 when saved
                 "twitter_user_id": str(twitter_user_id),
                 "twitter_username": twitter_username,
                 "scopes": ",".join(token_data.get('scope', []))
@@ -97,13 +144,20 @@ class OAuth2Handler:
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to fetch token: {str(e)}")
     
+    def close(self) -> None:
+        """
+        Close the HTTP sessions used for the token exchange and API calls
+        """
+        self.oauth2_handler.close()
+        self.http.close()
+    
     async def refresh_access_token(self, refresh_token: str) -> Dict:
         """
         Refresh an expired access token
         """
         try:
             # Refresh the token
-            token_data = self.oauth2_handler.refresh_token(refresh_token)
+            token_data = await asyncio.to_thread(self.oauth2_handler.refresh_token, refresh_token)
             
             # Calculate new expiration
             expires_at = datetime.utcnow() + timedelta(seconds=token_data['expires_in'])
@@ -111,7 +165,7 @@ class OAuth2Handler:
             return {
                 "access_token": token_data['access_token'],
                 "refresh_token": token_data.get('refresh_token', refresh_token),
-                "expires_at": expires_at,  # The DateTimeEncoder will handle this
+                "expires_at": expires_at,  # Serialized as ISO 8601 when saved
                 "scopes": ",".join(token_data.get('scope', []))
             }
         except Exception as e:
@@ -120,9 +174,36 @@ class OAuth2Handler:
     async def save_token(self, token_data: Dict[str, Any], user_id: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
         Save or update token in the JSON storage
+        
+        Recently saved logins are cached per Twitter user, so repeat logins skip
+        the token and user lookups.
+        """
+        twitter_user_id = token_data["twitter_user_id"]
+        lock = _token_locks.setdefault(twitter_user_id, asyncio.Lock())
+        _token_lock_users[twitter_user_id] = _token_lock_users.get(twitter_user_id, 0) + 1
+        
+        try:
+            async with lock:
+                return await self._save_token(token_data, user_id)
+        finally:
+            _token_lock_users[twitter_user_id] -= 1
+            if not _token_lock_users[twitter_user_id]:
+                del _token_lock_users[twitter_user_id]
+                del _token_locks[twitter_user_id]
+    
+    async def _save_token(self, token_data: Dict[str, Any], user_id: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Save or update token in the JSON storage, holding the Twitter user's lock
         """
+        twitter_user_id = token_data["twitter_user_id"]
+        
         # Check if a user with this Twitter ID already exists
-        existing_token = await get_token_by_twitter_user_id(token_data["twitter_user_id"])
+        cached = _get_cached_login(twitter_user_id)
+        if cached is not None:
+            user, existing_token = cached
+        else:
+            user = None
+            existing_token = await get_token_by_twitter_user_id(twitter_user_id)
         
         if existing_token:
             # Update existing token
@@ -138,20 +219,25 @@ class OAuth2Handler:
             await update_token(existing_token["id"], token_update)
             
             # Get the user
-            user = await get_user(existing_token["user_id"])
+            if user is None:
+                user = await get_user(existing_token["user_id"])
             
             # Update the token with new values
             updated_token = {**existing_token, **token_update}
+            _cache_login(twitter_user_id, user, updated_token)
             
             return user, updated_token
         else:
+            # One timestamp for every created_at/updated_at written below
+            now = datetime.utcnow()
+            
             # Create new user if user_id is not provided
             if not user_id:
                 # Create user model
                 user_data = {
                     "username": token_data["twitter_username"],
-                    "created_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
+                    "created_at": now,
+                    "updated_at": now
                 }
                 
                 # Create user in storage
@@ -170,14 +256,33 @@ class OAuth2Handler:
                 "refresh_token": token_data.get("refresh_token"),
                 "expires_at": token_data["expires_at"],
                 "scopes": token_data.get("scopes", ""),
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow(),
+                "created_at": now,
+                "updated_at": now,
                 "is_active": True
             }
             
             # Create token in storage
             token_id = await create_token(token_data_to_save)
             token_data_to_save["id"] = token_id
+            _cache_login(twitter_user_id, user_data, token_data_to_save)
             
             return user_data, token_data_to_save
 
+# Shared handler, created on first use
+_oauth_handler: Optional[OAuth2Handler] = None
+
+def get_oauth_handler() -> OAuth2Handler:
+    """
+    Return the shared OAuth2Handler, creating it on first use
+    """
+    global _oauth_handler
+    if _oauth_handler is None:
+        _oauth_handler = OAuth2Handler()
+    return _oauth_handler
+
+def close_oauth_handler() -> None:
+    """
+    Close the shared OAuth2Handler's HTTP sessions, if it was created
+    """
+    if _oauth_handler is not None:
+        _oauth_handler.close()
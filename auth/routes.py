@@ -1,15 +1,41 @@
+import asyncio
+import logging
 from fastapi import APIRouter, Request, HTTPException, status
 from fastapi.responses import RedirectResponse, JSONResponse
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 
-from auth.oauth import OAuth2Handler
-from database.db import get_users, get_user, get_tokens, update_token_by_user_id
+from auth.oauth import get_oauth_handler, invalidate_cached_login
+from database.db import get_users, get_user, get_tokens, get_token_by_user_id, update_token_by_user_id
+from twitter.api import TwitterAPI
+
+logger = logging.getLogger(__name__)
 
 # Create router
 auth_router = APIRouter()
 
 # Initialize OAuth handler
-oauth_handler = OAuth2Handler()
+oauth_handler = get_oauth_handler()
+
+# Cache warm-ups started after login, kept referenced until they finish
+_prefetch_tasks: Set[asyncio.Task] = set()
+
+def _start_prefetch(user_id: Optional[str], twitter_user_id: Optional[str]) -> None:
+    """
+    Fetch a newly logged-in user's info and timeline in the background so the
+    first agent turn is served from TwitterAPI's read cache
+    """
+    async def prefetch():
+        twitter_api = TwitterAPI(user_id=user_id, twitter_user_id=twitter_user_id)
+        try:
+            await twitter_api.prefetch()
+        except Exception as e:
+            logger.warning("Failed to prefetch data for user %s: %s", user_id or twitter_user_id, e)
+        finally:
+            await twitter_api.close()
+    
+    task = asyncio.create_task(prefetch())
+    _prefetch_tasks.add(task)
+    task.add_done_callback(_prefetch_tasks.discard)
 
 @auth_router.get("/login")
 async def login(request: Request):
@@ -41,6 +67,9 @@ async def callback(request: Request, code: str, state: Optional[str] = None):
         # Save token to database
         user, token = await oauth_handler.save_token(token_data)
         
+        # Warm the read cache without holding up the login response
+        _start_prefetch(user.get("id"), token.get("twitter_user_id"))
+        
         # Return success JSON
         return {
             "status": "success",
@@ -65,19 +94,17 @@ async def get_all_users():
     """
     Get all authenticated users
     """
-    users_data = await get_users()
-    tokens_data = await get_tokens()
+    users_data, tokens_data = await asyncio.gather(get_users(), get_tokens())
+    
+    # Index tokens by user once, keeping the first token seen for each user
+    tokens_by_user = {}
+    for token in tokens_data.values():
+        tokens_by_user.setdefault(token.get("user_id"), token)
     
     # Combine user and token data
     result = []
     for user_id, user in users_data.items():
-        # Find the token for this user
-        user_token = None
-        for token_id, token in tokens_data.items():
-            if token.get("user_id") == user_id:
-                user_token = token
-                break
-        
+        user_token = tokens_by_user.get(user_id)
         if user_token:
             result.append({
                 "id": user_id,
@@ -93,13 +120,12 @@ async def get_user_by_id(user_id: str):
     """
     Get a specific user by ID
     """
-    user_data = await get_user(user_id)
+    # Load the user and the tokens to find their token in together
+    user_data, tokens_data = await asyncio.gather(get_user(user_id), get_tokens())
     
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get tokens data to find the token for this user
-    tokens_data = await get_tokens()
     user_token = None
     
     for token_id, token in tokens_data.items():
@@ -129,10 +155,16 @@ async def revoke_access(user_id: str):
     """
     Revoke a user's Twitter access
     """
+    token = await get_token_by_user_id(user_id)
+    
     # Update token to set is_active to False
     result = await update_token_by_user_id(user_id, {"is_active": False})
     
     if not result:
         raise HTTPException(status_code=404, detail="User token not found")
     
+    # A login right after revoking must not get the revoked token back from the cache
+    if token:
+        invalidate_cached_login(token["twitter_user_id"])
+    
     return {"message": "Access revoked successfully"}
@@ -12,6 +12,14 @@ TWITTER_CALLBACK_URL = os.getenv("TWITTER_CALLBACK_URL", "http://localhost:8000/
 # Data directory settings
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+# Pretty-print the users and tokens files (for reading them by hand)
+DB_PRETTY_JSON = os.getenv("DB_PRETTY_JSON", "False").lower() in ("true", "1", "t")
+
+# Serve repeated read-only agent queries in the development scripts from an on-disk cache
+LLM_CACHE = os.getenv("LLM_CACHE", "False").lower() in ("true", "1", "t")
+
+# Replay the tool calls of an earlier successful write-only query for queries differing only in arguments
+PLAN_TEMPLATES = os.getenv("PLAN_TEMPLATES", "False").lower() in ("true", "1", "t")
 
 # Development settings
 DEBUG = os.getenv("DEBUG", "True").lower() in ("true", "1", "t")
@@ -3,11 +3,14 @@ import os
 import logging
 import aiofiles
 import asyncio
+import heapq
+import orjson
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from config import DB_PRETTY_JSON
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Define data directory
@@ -20,10 +23,35 @@ os.makedirs(DATA_DIR, exist_ok=True)
 USERS_FILE = os.path.join(DATA_DIR, 'users.json')
 TOKENS_FILE = os.path.join(DATA_DIR, 'tokens.json')
 
+# orjson options for the users and tokens files; compact unless pretty-printing is enabled
+JSON_WRITE_OPTIONS = orjson.OPT_INDENT_2 if DB_PRETTY_JSON else 0
+
+# Maximum number of saved tweet files read at once
+MAX_CONCURRENT_READS = 16
+
+# Per-user tweet directories already created on disk
+_tweet_dirs: Set[str] = set()
+
 # File locks to prevent race conditions
 users_lock = asyncio.Lock()
 tokens_lock = asyncio.Lock()
 
+# Decoded JSON files by path, with the mtime they were read or written at
+_file_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+# Next numeric ID to hand out for records in each JSON file
+_next_ids: Dict[str, int] = {}
+
+# Decoded tokens.json that the indexes below were built from
+_tokens: Optional[Dict[str, Any]] = None
+
+# Secondary indexes over active tokens: user ID / Twitter user ID -> token ID
+_user_id_index: Dict[str, str] = {}
+_twitter_user_id_index: Dict[str, str] = {}
+
+# ID of the first active token in file order, if any
+_first_active_token_id: Optional[str] = None
+
 async def init_db():
     """
     Initialize the JSON storage files if they don't exist
@@ -37,35 +65,89 @@ async def init_db():
     if not os.path.exists(TOKENS_FILE):
         async with aiofiles.open(TOKENS_FILE, 'w') as f:
             await f.write(json.dumps({}))
+    
+    # Load tokens and build their indexes
+    async with tokens_lock:
+        await _load_tokens()
 
 async def read_json_file(file_path: str) -> Dict:
     """
     Read and parse a JSON file
     """
     try:
-        async with aiofiles.open(file_path, 'r') as f:
+        async with aiofiles.open(file_path, 'rb') as f:
             content = await f.read()
-            return json.loads(content) if content else {}
+            return orjson.loads(content) if content else {}
     except FileNotFoundError:
         # If file doesn't exist, return empty dict
         return {}
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         # If JSON is invalid, return empty dict
         return {}
 
-# Custom JSON encoder to handle datetime objects
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+def _atomic_write_bytes(file_path: str, content: bytes) -> None:
+    """
+    Write bytes to a temporary file and move it over the target in one step
+    """
+    tmp_path = f"{file_path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(content)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, file_path)
+
+async def write_json_file(file_path: str, data: Dict) -> bytes:
+    """
+    Write data to a JSON file and return the written bytes
+    
+    The file is rewritten in full on every change, so it is kept compact unless
+    DB_PRETTY_JSON is set. Datetimes are written in ISO 8601 format.
+    """
+    content = orjson.dumps(data, option=JSON_WRITE_OPTIONS)
+    await asyncio.to_thread(_atomic_write_bytes, file_path, content)
+    return content
+
+async def _load_cached(file_path: str) -> Dict[str, Any]:
+    """
+    Read and parse a JSON file, reusing the cached data while its mtime is unchanged
+    
+    The returned dict is shared; callers must copy it before making changes.
+    """
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    
+    cached = _file_cache.get(file_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    data = await read_json_file(file_path)
+    _file_cache[file_path] = (mtime, data)
+    
+    # Never hand out an ID at or below one already in the file
+    highest = max((int(key) for key in data if key.isdigit()), default=0)
+    _next_ids[file_path] = max(_next_ids.get(file_path, 1), highest + 1)
+    return data
+
+def _mint_id(file_path: str) -> str:
+    """
+    Take the next record ID for a JSON file; callers hold the file's lock and have loaded it
+    """
+    record_id = _next_ids.get(file_path, 1)
+    _next_ids[file_path] = record_id + 1
+    return str(record_id)
 
-async def write_json_file(file_path: str, data: Dict) -> None:
+async def _write_cached(file_path: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Write data to a JSON file
+    Write data to a JSON file and cache it as decoded from the written text
     """
-    async with aiofiles.open(file_path, 'w') as f:
-        await f.write(json.dumps(data, indent=2, cls=DateTimeEncoder))
+    decoded = orjson.loads(await write_json_file(file_path, data))
+    _file_cache[file_path] = (os.stat(file_path).st_mtime_ns, decoded)
+    return decoded
 
 # User operations
 async def get_users() -> Dict[str, Any]:
@@ -73,7 +155,7 @@ async def get_users() -> Dict[str, Any]:
     Get all users
     """
     async with users_lock:
-        return await read_json_file(USERS_FILE)
+        return await _load_cached(USERS_FILE)
 
 async def get_user(user_id: str) -> Optional[Dict[str, Any]]:
     """
@@ -87,10 +169,10 @@ async def create_user(user_data: Dict[str, Any]) -> str:
     Create a new user
     """
     async with users_lock:
-        users = await read_json_file(USERS_FILE)
+        users = dict(await _load_cached(USERS_FILE))
         
         # Generate a new user ID
-        user_id = str(len(users) + 1)
+        user_id = _mint_id(USERS_FILE)
         
         # Add user ID to user data
         user_data['id'] = user_id
@@ -99,7 +181,7 @@ async def create_user(user_data: Dict[str, Any]) -> str:
         users[user_id] = user_data
         
         # Write updated users to file
-        await write_json_file(USERS_FILE, users)
+        await _write_cached(USERS_FILE, users)
         
         return user_id
 
@@ -108,26 +190,62 @@ async def update_user(user_id: str, user_data: Dict[str, Any]) -> bool:
     Update an existing user
     """
     async with users_lock:
-        users = await read_json_file(USERS_FILE)
+        users = dict(await _load_cached(USERS_FILE))
         
         if user_id not in users:
             return False
         
-        # Update user data
-        users[user_id].update(user_data)
+        # Update a copy of the user so the cache only changes once the write succeeds
+        users[user_id] = {**users[user_id], **user_data}
         
         # Write updated users to file
-        await write_json_file(USERS_FILE, users)
+        await _write_cached(USERS_FILE, users)
         
         return True
 
 # Token operations
+def _index_tokens(tokens: Dict[str, Any]) -> None:
+    """
+    Record the tokens the indexes describe and rebuild the indexes
+    
+    Only active tokens are indexed, and the first token for each ID wins.
+    """
+    global _tokens, _first_active_token_id
+    _tokens = tokens
+    _first_active_token_id = None
+    _user_id_index.clear()
+    _twitter_user_id_index.clear()
+    for token_id, token_data in tokens.items():
+        if not token_data.get('is_active', False):
+            continue
+        if _first_active_token_id is None:
+            _first_active_token_id = token_id
+        if token_data.get('user_id') is not None:
+            _user_id_index.setdefault(str(token_data['user_id']), token_id)
+        if token_data.get('twitter_user_id') is not None:
+            _twitter_user_id_index.setdefault(str(token_data['twitter_user_id']), token_id)
+
+async def _load_tokens() -> Dict[str, Any]:
+    """
+    Get the cached tokens, re-indexing them if the file changed; callers hold tokens_lock
+    """
+    tokens = await _load_cached(TOKENS_FILE)
+    if tokens is not _tokens:
+        _index_tokens(tokens)
+    return tokens
+
+async def _write_tokens(tokens: Dict[str, Any]) -> None:
+    """
+    Write tokens to file and cache them as decoded from it; callers hold tokens_lock
+    """
+    _index_tokens(await _write_cached(TOKENS_FILE, tokens))
+
 async def get_tokens() -> Dict[str, Any]:
     """
     Get all tokens
     """
     async with tokens_lock:
-        return await read_json_file(TOKENS_FILE)
+        return await _load_tokens()
 
 async def get_token(token_id: str) -> Optional[Dict[str, Any]]:
     """
@@ -136,37 +254,28 @@ async def get_token(token_id: str) -> Optional[Dict[str, Any]]:
     tokens = await get_tokens()
     return tokens.get(token_id)
 
+async def get_first_active_token() -> Optional[Dict[str, Any]]:
+    """
+    Get the first active token
+    """
+    tokens = await get_tokens()
+    return tokens.get(_first_active_token_id) if _first_active_token_id is not None else None
+
 async def get_token_by_user_id(user_id: str) -> Optional[Dict[str, Any]]:
     """
     Get a token by user ID
     """
     tokens = await get_tokens()
-    
-    for token_id, token_data in tokens.items():
-        # Convert stored user_id to string for comparison if it's not already a string
-        stored_user_id = str(token_data.get('user_id', '')) if token_data.get('user_id') is not None else ''
-        
-        # Check if the user_id matches and the token is active
-        if stored_user_id == str(user_id) and token_data.get('is_active', False):
-            return token_data
-    
-    return None
+    token_id = _user_id_index.get(str(user_id))
+    return tokens.get(token_id) if token_id is not None else None
 
 async def get_token_by_twitter_user_id(twitter_user_id: str) -> Optional[Dict[str, Any]]:
     """
     Get a token by Twitter user ID
     """
     tokens = await get_tokens()
-    
-    for token_id, token_data in tokens.items():
-        # Convert stored twitter_user_id to string for comparison if it's not already a string
-        stored_twitter_user_id = str(token_data.get('twitter_user_id', '')) if token_data.get('twitter_user_id') is not None else ''
-        
-        # Check if the twitter_user_id matches and the token is active
-        if stored_twitter_user_id == str(twitter_user_id) and token_data.get('is_active', False):
-            return token_data
-    
-    return None
+    token_id = _twitter_user_id_index.get(str(twitter_user_id))
+    return tokens.get(token_id) if token_id is not None else None
 
 
 # Tweet storage functions
@@ -183,13 +292,11 @@ async def save_tweets(user_id: str, tweets: List[Dict], tweet_type: str = "timel
         True if successful, False otherwise
     """
     try:
-        # Create tweets directory if it doesn't exist
-        tweets_dir = os.path.join(DATA_DIR, "tweets")
-        os.makedirs(tweets_dir, exist_ok=True)
-        
-        # Create user-specific directory
-        user_tweets_dir = os.path.join(tweets_dir, str(user_id))
-        os.makedirs(user_tweets_dir, exist_ok=True)
+        # Create the user-specific tweets directory (and its parents) once
+        user_tweets_dir = os.path.join(DATA_DIR, "tweets", str(user_id))
+        if user_tweets_dir not in _tweet_dirs:
+            os.makedirs(user_tweets_dir, exist_ok=True)
+            _tweet_dirs.add(user_tweets_dir)
         
         # Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -210,6 +317,30 @@ async def save_tweets(user_id: str, tweets: List[Dict], tweet_type: str = "timel
         return False
 
 
+
+async def save_tweets_bulk(rows: List[Tuple[str, List[Dict], str]]) -> bool:
+    """
+    Save several batches of tweets at once
+    
+    Batches for the same user and tweet type are merged into one file, and
+    the files are written concurrently.
+    
+    Args:
+        rows: (user_id, tweets, tweet_type) tuples to save
+        
+    Returns:
+        True if every file was saved, False otherwise
+    """
+    grouped: Dict[Tuple[str, str], List[Dict]] = {}
+    for user_id, tweets, tweet_type in rows:
+        grouped.setdefault((str(user_id), tweet_type), []).extend(tweets)
+    
+    results = await asyncio.gather(*(
+        save_tweets(user_id, tweets, tweet_type=tweet_type)
+        for (user_id, tweet_type), tweets in grouped.items()
+    ))
+    return all(results)
+
 async def get_saved_tweets(user_id: str, tweet_type: str = None, limit: int = 10) -> List[Dict]:
     """
     Get saved tweets for a specific user
@@ -229,29 +360,23 @@ async def get_saved_tweets(user_id: str, tweet_type: str = None, limit: int = 10
         if not os.path.exists(user_tweets_dir):
             return []
         
-        # Get list of tweet files
-        files = [f for f in os.listdir(user_tweets_dir) if f.endswith(".json")]
+        # Select the newest tweet files (by name), filtering by tweet type if specified,
+        # without sorting the whole directory listing
+        prefix = f"{tweet_type}_" if tweet_type else ""
+        files = heapq.nlargest(limit, (
+            f for f in os.listdir(user_tweets_dir)
+            if f.endswith(".json") and f.startswith(prefix)
+        ))
         
-        # Filter by tweet type if specified
-        if tweet_type:
-            files = [f for f in files if f.startswith(f"{tweet_type}_")]
+        # Load tweet data from files concurrently, keeping the newest-first order
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_READS)
         
-        # Sort by timestamp (newest first)
-        files.sort(reverse=True)
+        async def load(filename: str) -> Dict:
+            async with semaphore:
+                async with aiofiles.open(os.path.join(user_tweets_dir, filename), "rb") as f:
+                    return orjson.loads(await f.read())
         
-        # Limit the number of files
-        files = files[:limit]
-        
-        # Load tweet data from files
-        result = []
-        for filename in files:
-            file_path = os.path.join(user_tweets_dir, filename)
-            async with aiofiles.open(file_path, "r") as f:
-                content = await f.read()
-                data = json.loads(content)
-                result.append(data)
-        
-        return result
+        return list(await asyncio.gather(*(load(filename) for filename in files)))
     except Exception as e:
         logger.error(f"Error getting saved tweets: {str(e)}")
         return []
@@ -261,10 +386,10 @@ async def create_token(token_data: Dict[str, Any]) -> str:
     Create a new token
     """
     async with tokens_lock:
-        tokens = await read_json_file(TOKENS_FILE)
+        tokens = dict(await _load_tokens())
         
         # Generate a new token ID
-        token_id = str(len(tokens) + 1)
+        token_id = _mint_id(TOKENS_FILE)
         
         # Add token ID to token data
         token_data['id'] = token_id
@@ -273,7 +398,7 @@ async def create_token(token_data: Dict[str, Any]) -> str:
         tokens[token_id] = token_data
         
         # Write updated tokens to file
-        await write_json_file(TOKENS_FILE, tokens)
+        await _write_tokens(tokens)
         
         return token_id
 
@@ -282,16 +407,16 @@ async def update_token(token_id: str, token_data: Dict[str, Any]) -> bool:
     Update an existing token
     """
     async with tokens_lock:
-        tokens = await read_json_file(TOKENS_FILE)
+        tokens = dict(await _load_tokens())
         
         if token_id not in tokens:
             return False
         
-        # Update token data
-        tokens[token_id].update(token_data)
+        # Update a copy of the token so the cache only changes once the write succeeds
+        tokens[token_id] = {**tokens[token_id], **token_data}
         
         # Write updated tokens to file
-        await write_json_file(TOKENS_FILE, tokens)
+        await _write_tokens(tokens)
         
         return True
 
@@ -300,16 +425,20 @@ async def update_token_by_user_id(user_id: str, token_data: Dict[str, Any]) -> b
     Update a token by user ID
     """
     async with tokens_lock:
-        tokens = await read_json_file(TOKENS_FILE)
-        
-        for token_id, current_token_data in tokens.items():
-            if current_token_data.get('user_id') == user_id:
-                # Update token data
-                tokens[token_id].update(token_data)
-                
-                # Write updated tokens to file
-                await write_json_file(TOKENS_FILE, tokens)
-                
-                return True
+        tokens = await _load_tokens()
         
-        return False
+        # Prefer the user's active token, falling back to any token they hold
+        token_id = _user_id_index.get(str(user_id))
+        if token_id is None:
+            token_id = next((tid for tid, t in tokens.items() if t.get('user_id') == user_id), None)
+        if token_id is None:
+            return False
+        
+        # Update a copy of the token so the cache only changes once the write succeeds
+        tokens = dict(tokens)
+        tokens[token_id] = {**tokens[token_id], **token_data}
+        
+        # Write updated tokens to file
+        await _write_tokens(tokens)
+        
+        return True
@@ -14,28 +14,16 @@ class User(BaseModel):
     
     def to_dict(self) -> Dict[str, Any]:
         """
-        Convert model to dictionary for JSON storage
+        Convert model to dictionary for JSON storage, with datetimes as ISO strings
         """
-        return {
-            "id": self.id,
-            "username": self.username,
-            "email": self.email,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
-        }
+        return self.model_dump(mode="json")
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'User':
         """
-        Create model from dictionary
+        Create model from dictionary, parsing ISO datetime strings
         """
-        # Convert string dates to datetime objects
-        if isinstance(data.get("created_at"), str):
-            data["created_at"] = datetime.datetime.fromisoformat(data["created_at"])
-        if isinstance(data.get("updated_at"), str):
-            data["updated_at"] = datetime.datetime.fromisoformat(data["updated_at"])
-            
-        return cls(**data)
+        return cls.model_validate(data)
 
 class TwitterToken(BaseModel):
     """
@@ -59,33 +47,13 @@ class TwitterToken(BaseModel):
     
     def to_dict(self) -> Dict[str, Any]:
         """
-        Convert model to dictionary for JSON storage
+        Convert model to dictionary for JSON storage, with datetimes as ISO strings
         """
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "twitter_user_id": self.twitter_user_id,
-            "twitter_username": self.twitter_username,
-            "access_token": self.access_token,
-            "refresh_token": self.refresh_token,
-            "expires_at": self.expires_at.isoformat(),
-            "scopes": self.scopes,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-            "is_active": self.is_active
-        }
+        return self.model_dump(mode="json")
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'TwitterToken':
         """
-        Create model from dictionary
+        Create model from dictionary, parsing ISO datetime strings
         """
-        # Convert string dates to datetime objects
-        if isinstance(data.get("expires_at"), str):
-            data["expires_at"] = datetime.datetime.fromisoformat(data["expires_at"])
-        if isinstance(data.get("created_at"), str):
-            data["created_at"] = datetime.datetime.fromisoformat(data["created_at"])
-        if isinstance(data.get("updated_at"), str):
-            data["updated_at"] = datetime.datetime.fromisoformat(data["updated_at"])
-            
-        return cls(**data)
+        return cls.model_validate(data)
@@ -6,6 +6,7 @@ import asyncio
 import logging
 from dotenv import load_dotenv
 from agent.agent import TwitterAgent
+from agent.cache import LLMCache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,12 +20,15 @@ async def test_agent():
     # Create a Twitter agent
     agent = TwitterAgent()
     
+    # Reuse earlier responses to the same query when LLM_CACHE is enabled
+    cache = LLMCache()
+    
     # Test with a simple query
     query = "Search for tweets about artificial intelligence"
     
     try:
         # Process the query
-        response = await agent.process_query(query=query)
+        response = await cache.process_query(agent, query=query)
         
         # Print the response
         logger.info(f"Agent response: {response.response}")
@@ -40,6 +44,8 @@ async def test_agent():
         logger.error(f"Error processing query: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
+    finally:
+        cache.log_stats()
 
 if __name__ == "__main__":
     asyncio.run(test_agent())
@@ -2,12 +2,14 @@
 Test script for the Twitter agent using smolagents with CodeAgent approach.
 """
 import os
-import json
 import asyncio
+import aiofiles
+import orjson
 import logging
 from dotenv import load_dotenv
 from smolagents import CodeAgent, LiteLLMModel
 from agent.tools import TwitterTools
+from agent.prompts import TOOL_REUSE_INSTRUCTIONS
 from twitter.api import TwitterAPI
 
 # Set up logging
@@ -22,11 +24,11 @@ async def get_user_id():
     try:
         tokens_path = os.path.join('data', 'tokens.json')
         if os.path.exists(tokens_path):
-            with open(tokens_path, 'r') as f:
-                tokens = json.load(f)
-                if tokens and len(tokens) > 0:
-                    # Return the first user ID
-                    return list(tokens.keys())[0]
+            # Read without blocking the event loop
+            async with aiofiles.open(tokens_path, 'rb') as f:
+                tokens = orjson.loads(await f.read())
+            # Return the first user ID
+            return next(iter(tokens), None)
     except Exception as e:
         logger.error(f"Error getting user ID: {str(e)}")
     
@@ -56,14 +58,21 @@ async def test_agent():
     twitter_tools = TwitterTools(twitter_api)
     tools = twitter_tools.get_tools()
     
-    # Initialize LiteLLM model and CodeAgent
+    # Initialize LiteLLM model; each query gets its own CodeAgent because agents keep
+    # per-run memory, and building one opens no connections
     model = LiteLLMModel(model_id="gpt-4o", api_key=api_key)
-    agent = CodeAgent(
-        tools=tools, 
-        model=model, 
-        add_base_tools=False,
-        system_prompt="You are a helpful Twitter assistant that can perform various Twitter operations. Use the available tools to help the user with their Twitter-related tasks."
-    )
+    
+    def make_agent() -> CodeAgent:
+        return CodeAgent(
+            tools=tools, 
+            model=model, 
+            add_base_tools=False,
+            system_prompt="You are a helpful Twitter assistant that can perform various Twitter operations. Use the available tools to help the user with their Twitter-related tasks.\n\n" + TOOL_REUSE_INSTRUCTIONS
+        )
+    
+    async def run_query(query: str):
+        logger.info(f"Testing query: {query}")
+        return await make_agent().run_async(query)
     
     # Test queries
     queries = [
@@ -72,11 +81,14 @@ async def test_agent():
         "Post a tweet saying 'Testing the Twitter agent with smolagents!'"
     ]
     
-    for query in queries:
-        logger.info(f"Testing query: {query}")
+    # The queries are independent, so run them concurrently and report them in order
+    results = await asyncio.gather(*(run_query(query) for query in queries), return_exceptions=True)
+    
+    for query, result in zip(queries, results):
+        logger.info(f"Results for query: {query}")
         try:
-            # Run the agent
-            result = await agent.run_async(query)
+            if isinstance(result, Exception):
+                raise result
             
             # Print the response
             logger.info(f"Agent response: {result.output}")
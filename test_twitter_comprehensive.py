@@ -8,7 +8,7 @@ import json
 import asyncio
 import logging
 from dotenv import load_dotenv
-from twitter.api import TwitterAPI
+from tests._shared import get_api
 from agent.utils import save_json, generate_timestamped_filename
 
 # Set up logging
@@ -24,8 +24,7 @@ async def test_twitter_endpoints():
     user_id = "2"  # Using user_id 2 which is active in tokens.json
     logger.info(f"Initializing TwitterAPI for user_id: {user_id}")
     
-    twitter_api = TwitterAPI(user_id=user_id)
-    await twitter_api.initialize_client()
+    twitter_api = await get_api(user_id)
     
     # Get username from token data
     if hasattr(twitter_api, 'token') and twitter_api.token:
@@ -34,22 +33,39 @@ async def test_twitter_endpoints():
     else:
         logger.info("Twitter API initialized successfully")
     
+    # One timestamp for both the results record and its file name
+    timestamp = generate_timestamped_filename("", "")
+    
     # Dictionary to store all test results
     test_results = {
-        "timestamp": generate_timestamped_filename("", ""),
+        "timestamp": timestamp,
         "user_id": user_id,
         "endpoints": {}
     }
     
+    # The three reads are independent, so run them concurrently and report
+    # each result (or its exception) in order below
+    search_query = "python"
+    user_info, timeline, search_results = await asyncio.gather(
+        twitter_api.get_user_info(),
+        twitter_api.get_user_timeline(limit=5),
+        # Twitter API requires minimum 10 results for search
+        twitter_api.search_tweets(query=search_query, limit=10),
+        return_exceptions=True
+    )
+    
     # Test 1: Get user info
     logger.info("\n=== Testing get_user_info endpoint ===")
     try:
-        user_info = await twitter_api.get_user_info()
-        logger.info(f"Successfully retrieved user info:")
-        logger.info(f"  Username: {user_info.get('username', '')}")
-        logger.info(f"  Name: {user_info.get('name', '')}")
-        logger.info(f"  Followers: {user_info.get('followers_count', 0)}")
-        logger.info(f"  Following: {user_info.get('following_count', 0)}")
+        if isinstance(user_info, Exception):
+            raise user_info
+        logger.info(
+            f"Successfully retrieved user info:\n"
+            f"  Username: {user_info.get('username', '')}\n"
+            f"  Name: {user_info.get('name', '')}\n"
+            f"  Followers: {user_info.get('followers_count', 0)}\n"
+            f"  Following: {user_info.get('following_count', 0)}"
+        )
         
         test_results["endpoints"]["get_user_info"] = {
             "success": True,
@@ -65,17 +81,20 @@ async def test_twitter_endpoints():
     # Test 2: Get user timeline
     logger.info("\n=== Testing get_user_timeline endpoint ===")
     try:
-        timeline = await twitter_api.get_user_timeline(limit=5)
+        if isinstance(timeline, Exception):
+            raise timeline
         logger.info(f"Successfully retrieved {len(timeline)} tweets from timeline")
         
         # Display first 3 tweets
         for i, tweet in enumerate(timeline[:3], 1):
-            logger.info(f"Tweet {i}:")
-            logger.info(f"  ID: {tweet.get('id', '')}")
-            logger.info(f"  Text: {tweet.get('text', '')[:100]}...")
-            logger.info(f"  Created at: {tweet.get('created_at', '')}")
-            logger.info(f"  Likes: {tweet.get('public_metrics', {}).get('like_count', 0)}")
-            logger.info(f"  Retweets: {tweet.get('public_metrics', {}).get('retweet_count', 0)}")
+            logger.info(
+                f"Tweet {i}:\n"
+                f"  ID: {tweet.get('id', '')}\n"
+                f"  Text: {tweet.get('text', '')[:100]}...\n"
+                f"  Created at: {tweet.get('created_at', '')}\n"
+                f"  Likes: {tweet.get('public_metrics', {}).get('like_count', 0)}\n"
+                f"  Retweets: {tweet.get('public_metrics', {}).get('retweet_count', 0)}"
+            )
         
         test_results["endpoints"]["get_user_timeline"] = {
             "success": True,
@@ -91,19 +110,20 @@ async def test_twitter_endpoints():
     
     # Test 3: Search tweets
     logger.info("\n=== Testing search_tweets endpoint ===")
-    search_query = "python"
     try:
-        # Twitter API requires minimum 10 results for search
-        search_results = await twitter_api.search_tweets(query=search_query, limit=10)
+        if isinstance(search_results, Exception):
+            raise search_results
         logger.info(f"Successfully retrieved {len(search_results)} tweets from search")
         
         # Display first 3 tweets
         for i, tweet in enumerate(search_results[:3], 1):
-            logger.info(f"Tweet {i}:")
-            logger.info(f"  ID: {tweet.get('id', '')}")
-            logger.info(f"  Text: {tweet.get('text', '')[:100]}...")
-            logger.info(f"  Author: {tweet.get('author', {}).get('username', '')}")
-            logger.info(f"  Created at: {tweet.get('created_at', '')}")
+            logger.info(
+                f"Tweet {i}:\n"
+                f"  ID: {tweet.get('id', '')}\n"
+                f"  Text: {tweet.get('text', '')[:100]}...\n"
+                f"  Author: {tweet.get('author', {}).get('username', '')}\n"
+                f"  Created at: {tweet.get('created_at', '')}"
+            )
         
         test_results["endpoints"]["search_tweets"] = {
             "success": True,
@@ -125,9 +145,11 @@ async def test_twitter_endpoints():
     try:
         tweet_text = f"Testing Twitter API endpoints - {os.urandom(4).hex()}"
         result = await twitter_api.post_tweet(text=tweet_text)
-        logger.info(f"Successfully posted tweet:")
-        logger.info(f"  ID: {result.get('id', '')}")
-        logger.info(f"  Text: {result.get('text', '')}")
+        logger.info(
+            f"Successfully posted tweet:\n"
+            f"  ID: {result.get('id', '')}\n"
+            f"  Text: {result.get('text', '')}"
+        )
         
         test_results["endpoints"]["post_tweet"] = {
             "success": True,
@@ -147,7 +169,7 @@ async def test_twitter_endpoints():
     """
     
     # Save test results to a JSON file
-    results_file = f"twitter_api_test_results_{generate_timestamped_filename('', 'json')}"
+    results_file = f"twitter_api_test_results_{timestamp}json"
     results_path = os.path.join("data", results_file)
     save_json(test_results, results_path)
     logger.info(f"\nTest results saved to {results_path}")
@@ -8,7 +8,7 @@ import json
 import asyncio
 import logging
 from dotenv import load_dotenv
-from twitter.api import TwitterAPI
+from tests._shared import get_api
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -23,8 +23,7 @@ async def test_twitter_endpoints():
     user_id = "2"  # Using user_id 2 which is active in tokens.json
     logger.info(f"Initializing TwitterAPI for user_id: {user_id}")
     
-    twitter_api = TwitterAPI(user_id=user_id)
-    await twitter_api.initialize_client()
+    twitter_api = await get_api(user_id)
     
     # Get username from token data
     if hasattr(twitter_api, 'token') and twitter_api.token:
@@ -33,10 +32,22 @@ async def test_twitter_endpoints():
     else:
         logger.info("Twitter API initialized successfully")
     
+    # The three reads are independent, so run them concurrently and report
+    # each result (or its exception) in order below
+    search_query = "python"
+    timeline, search_results, user_info = await asyncio.gather(
+        twitter_api.get_user_timeline(limit=5),
+        # Twitter API requires minimum 10 results for search
+        twitter_api.search_tweets(query=search_query, limit=10),
+        twitter_api.get_user_info(),
+        return_exceptions=True
+    )
+    
     # Test getting user timeline
     logger.info("Testing get_user_timeline endpoint...")
     try:
-        timeline = await twitter_api.get_user_timeline(limit=5)
+        if isinstance(timeline, Exception):
+            raise timeline
         logger.info(f"Successfully retrieved {len(timeline)} tweets from timeline")
         for i, tweet in enumerate(timeline[:3], 1):  # Show first 3 tweets
             logger.info(f"Tweet {i}: {tweet.get('text', '')[:50]}...")
@@ -44,11 +55,10 @@ async def test_twitter_endpoints():
         logger.error(f"Error getting user timeline: {str(e)}")
     
     # Test searching tweets
-    search_query = "python"
     logger.info(f"Testing search_tweets endpoint with query: '{search_query}'...")
     try:
-        # Twitter API requires minimum 10 results for search
-        search_results = await twitter_api.search_tweets(query=search_query, limit=10)
+        if isinstance(search_results, Exception):
+            raise search_results
         logger.info(f"Successfully retrieved {len(search_results)} tweets from search")
         for i, tweet in enumerate(search_results[:3], 1):  # Show first 3 tweets
             logger.info(f"Tweet {i}: {tweet.get('text', '')[:50]}...")
@@ -58,12 +68,15 @@ async def test_twitter_endpoints():
     # Test getting user info
     logger.info("Testing get_user_info endpoint...")
     try:
-        user_info = await twitter_api.get_user_info()
-        logger.info(f"Successfully retrieved user info:")
-        logger.info(f"  Username: {user_info.get('username', '')}")
-        logger.info(f"  Name: {user_info.get('name', '')}")
-        logger.info(f"  Followers: {user_info.get('followers_count', 0)}")
-        logger.info(f"  Following: {user_info.get('following_count', 0)}")
+        if isinstance(user_info, Exception):
+            raise user_info
+        logger.info(
+            f"Successfully retrieved user info:\n"
+            f"  Username: {user_info.get('username', '')}\n"
+            f"  Name: {user_info.get('name', '')}\n"
+            f"  Followers: {user_info.get('followers_count', 0)}\n"
+            f"  Following: {user_info.get('following_count', 0)}"
+        )
     except Exception as e:
         logger.error(f"Error getting user info: {str(e)}")
     
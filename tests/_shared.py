@@ -0,0 +1,27 @@
+"""
+Helpers shared by the Twitter API test scripts.
+"""
+import asyncio
+from typing import Dict
+
+from twitter.api import TwitterAPI
+
+# Initialized clients by user ID, so scripts run in one process share a client
+_apis: Dict[str, TwitterAPI] = {}
+_apis_lock = asyncio.Lock()
+
+async def get_api(user_id: str) -> TwitterAPI:
+    """
+    Return an initialized TwitterAPI for the user, creating it on first use
+    """
+    api = _apis.get(user_id)
+    if api is not None:
+        return api
+    
+    async with _apis_lock:
+        # Another caller may have initialized it while we waited
+        if user_id not in _apis:
+            api = TwitterAPI(user_id=user_id)
+            await api.initialize_client()
+            _apis[user_id] = api
+        return _apis[user_id]
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import traceback
 import os
 import sys
@@ -8,20 +7,14 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from twitter.api import TwitterAPI
-from database.db import get_tokens
+from database.db import get_first_active_token
 
 async def main():
     """
     Simple script to test posting a tweet
     """
     # Get the first active token
-    tokens = await get_tokens()
-    active_token = None
-    
-    for token_id, token in tokens.items():
-        if token.get("is_active", False):
-            active_token = token
-            break
+    active_token = await get_first_active_token()
     
     if not active_token:
         print("No active tokens found. Please authenticate first.")
@@ -45,6 +38,9 @@ async def main():
     except Exception as e:
         print(f"Error posting tweet: {str(e)}")
         traceback.print_exc()
+    finally:
+        # Wait for the background save of the posted tweet and release the client
+        await api.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
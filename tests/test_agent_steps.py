@@ -0,0 +1,186 @@
+import asyncio
+import os
+import sys
+from typing import Dict, List, Optional, Any
+
+import pytest
+from smolagents.memory import ActionStep, FinalAnswerStep, ToolCall
+from smolagents.monitoring import AgentLogger, Timing
+from smolagents.utils import AgentExecutionError
+
+# Add project root to path to ensure imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import agent.agent as agent_module
+from agent import tools
+from agent.agent import TwitterAgent
+from agent.cache import FileCacheBackend, LLMCache
+from agent.models import ActionTaken, AgentResponse
+
+class FakeTwitterAPI:
+    """Twitter client returning canned data instead of calling Twitter."""
+    
+    def __init__(self, user_id: Optional[int] = None, twitter_user_id: Optional[str] = None, session: Any = None):
+        self.user_id = user_id
+        self.twitter_user_id = twitter_user_id
+    
+    async def initialize_client(self) -> None:
+        pass
+    
+    async def close(self) -> None:
+        pass
+    
+    @classmethod
+    def clear_read_cache(cls) -> None:
+        pass
+    
+    async def get_user_timeline(self, limit: int = 10) -> List[Dict]:
+        return [{"id": str(i), "text": f"tweet {i}", "author": {"username": "me"}} for i in range(limit)]
+    
+    async def post_tweet(self, text: str, reply_to_id: Optional[str] = None) -> Dict:
+        return {"id": "99", "text": text}
+
+class StubCodeAgent:
+    """
+    Stand-in for a smolagents CodeAgent that streams real memory steps.
+    
+    Each planned step runs its tool calls the way the agent's generated code would,
+    then yields the ToolCall and ActionStep a CodeAgent yields for it. A step planned
+    as an error message stands for code that raised before calling any tool.
+    """
+    
+    def __init__(self, plan: List[List[tuple]], answer: str = "answer"):
+        self.plan = plan
+        self.answer = answer
+        self.runs = 0
+        self.steps_run = 0
+    
+    def run(self, task: str, stream: bool = False):
+        self.runs += 1
+        for number, calls in enumerate(self.plan, 1):
+            self.steps_run += 1
+            error = None
+            if isinstance(calls, str):
+                code, error, calls = "fail()", AgentExecutionError(calls, AgentLogger()), []
+            else:
+                code = "; ".join(f"{name}(**{inputs!r})" for name, _, inputs in calls)
+            for name, helper, inputs in calls:
+                asyncio.run(tools._call_tool(name, helper, **inputs))
+            tool_call = ToolCall(name="python_interpreter", arguments=code, id=f"call_{number}")
+            yield tool_call
+            yield ActionStep(step_number=number, timing=Timing(start_time=0.0), tool_calls=[tool_call],
+                             code_action=code, observations="Execution logs:\n", error=error)
+        yield FinalAnswerStep(output=self.answer)
+
+@pytest.fixture
+def stub_agent(monkeypatch):
+    """Return a factory for a TwitterAgent whose sessions run the given StubCodeAgent."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(agent_module, "TwitterAPI", FakeTwitterAPI)
+    monkeypatch.setattr(tools, "_get_tools", lambda: [])
+    
+    def make(code_agent: StubCodeAgent) -> TwitterAgent:
+        monkeypatch.setattr(TwitterAgent, "_create_code_agent", lambda self, tools: code_agent)
+        return TwitterAgent()
+    
+    yield make
+    
+    TwitterAgent.clear_caches()
+    asyncio.run(TwitterAgent.close_sessions())
+
+def test_process_step_reads_real_action_step(stub_agent):
+    agent = stub_agent(StubCodeAgent([]))
+    tool_call = ToolCall(name="python_interpreter", arguments="get_timeline_tool(limit=1)", id="call_1")
+    step = ActionStep(step_number=1, timing=Timing(start_time=0.0), tool_calls=[tool_call],
+                      code_action=tool_call.arguments, observations="Execution logs:\n")
+    recorded = [{"name": "get_timeline_tool", "input": {"limit": 1}, "output": {"success": True, "tweets": [{"id": "1"}]}}]
+    
+    pending_saves = []
+    actions = agent._process_step(step, recorded, "7", pending_saves)
+    
+    assert [(action.tool, action.input, action.success) for action in actions] == [("get_timeline_tool", {"limit": 1}, True)]
+    assert pending_saves == [("7", [{"id": "1"}], "timeline")]
+
+def test_stream_query_yields_tool_calls_of_real_steps(stub_agent):
+    code_agent = StubCodeAgent([[("get_timeline_tool", tools.get_user_timeline, {"limit": 2})]])
+    agent = stub_agent(code_agent)
+    
+    async def collect():
+        return [item async for item in agent.stream_query("show my timeline", twitter_user_id="42")]
+    
+    items = asyncio.run(collect())
+    
+    action, response = items
+    assert isinstance(action, ActionTaken)
+    assert (action.tool, action.input, action.success) == ("get_timeline_tool", {"limit": 2}, True)
+    assert len(action.output["tweets"]) == 2
+    assert isinstance(response, AgentResponse)
+    assert response.response == "answer"
+    assert [a.tool for a in response.actions_taken] == ["get_timeline_tool"]
+
+def test_stream_query_stops_after_a_failed_real_step(stub_agent):
+    code_agent = StubCodeAgent(["NameError: fail is not defined", [("get_timeline_tool", tools.get_user_timeline, {"limit": 1})]])
+    agent = stub_agent(code_agent)
+    
+    async def collect():
+        return [item async for item in agent.stream_query("show my timeline", twitter_user_id="42")]
+    
+    action, response = asyncio.run(collect())
+    
+    assert (action.tool, action.input, action.success) == ("python_interpreter", {"args": "fail()"}, False)
+    assert action.output["error"] == "NameError: fail is not defined"
+    assert response.response.startswith("I ran the requested tools but all of them failed: python_interpreter: NameError")
+    assert code_agent.steps_run == 1
+
+def test_repeated_read_only_query_is_served_from_the_response_cache(stub_agent):
+    code_agent = StubCodeAgent([[("get_timeline_tool", tools.get_user_timeline, {"limit": 2})]])
+    agent = stub_agent(code_agent)
+    
+    async def ask_twice():
+        first = await agent.process_query("show my timeline", twitter_user_id="42")
+        second = await agent.process_query("show my timeline", twitter_user_id="42")
+        return first, second
+    
+    first, second = asyncio.run(ask_twice())
+    
+    assert [(action.tool, action.success) for action in first.actions_taken] == [("get_timeline_tool", True)]
+    assert first.response == "answer"
+    assert second is first
+    assert code_agent.runs == 1
+
+def test_llm_cache_round_trip(stub_agent, tmp_path):
+    code_agent = StubCodeAgent([[("get_timeline_tool", tools.get_user_timeline, {"limit": 2})]])
+    agent = stub_agent(code_agent)
+    cache = LLMCache(backend=FileCacheBackend(directory=str(tmp_path)), enabled=True)
+    
+    async def ask_twice():
+        first = await cache.process_query(agent, "show my timeline", twitter_user_id="42")
+        # Only the on-disk cache may answer the second query
+        TwitterAgent.clear_caches()
+        second = await cache.process_query(agent, "show my timeline", twitter_user_id="42")
+        return first, second
+    
+    first, second = asyncio.run(ask_twice())
+    
+    assert len(list(tmp_path.iterdir())) == 1
+    assert second.model_dump() == first.model_dump()
+    assert cache.stats == {"hits": 1, "misses": 1}
+    assert code_agent.runs == 1
+
+def test_successful_write_run_is_replayed_as_a_plan(stub_agent, monkeypatch):
+    monkeypatch.setattr(agent_module, "PLAN_TEMPLATES", True)
+    code_agent = StubCodeAgent([[("post_tweet_tool", tools.post_tweet, {"text": "hello", "reply_to_id": None})]])
+    agent = stub_agent(code_agent)
+    
+    async def post_twice():
+        first = await agent.process_query('post a tweet saying "hello"', twitter_user_id="42")
+        second = await agent.process_query('post a tweet saying "bye"', twitter_user_id="42")
+        return first, second
+    
+    first, second = asyncio.run(post_twice())
+    
+    assert [(action.tool, action.success) for action in first.actions_taken] == [("post_tweet_tool", True)]
+    assert [(action.tool, action.input["text"], action.output["text"]) for action in second.actions_taken] == [
+        ("post_tweet_tool", "bye", "bye")
+    ]
+    assert code_agent.runs == 1
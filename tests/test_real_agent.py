@@ -1,8 +1,10 @@
 import asyncio
+import argparse
 import logging
 import os
 import sys
 import json
+from pathlib import Path
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 
@@ -21,6 +23,42 @@ logger = logging.getLogger(__name__)
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from agent.agent import TwitterAgent
+from agent.cache import LLMCache
+
+def load_first_twitter_user_id() -> Optional[str]:
+    """Return the Twitter user ID of the first token in tokens.json."""
+    with open('data/tokens.json', 'r') as f:
+        tokens = json.load(f)
+    if not tokens:
+        return None
+    # Use the first token's twitter_user_id
+    first_token_key = list(tokens.keys())[0]
+    twitter_user_id = tokens[first_token_key].get("twitter_user_id")
+    print(f"Using Twitter user ID: {twitter_user_id}")
+    return twitter_user_id
+
+def print_response(response: Any, label: str = "") -> None:
+    """Print the agent's response and the actions it took."""
+    print("=" * 50)
+    print(f"AGENT RESPONSE{label}:")
+    print("=" * 50)
+    print(response.response)
+    print("=" * 50)
+    
+    # Display actions taken
+    if response.actions_taken:
+        print(f"ACTIONS TAKEN{label}:")
+        print("=" * 50)
+        for i, action in enumerate(response.actions_taken, 1):
+            print(f"--- Action {i}: {action.tool} ---")
+            print("Input:")
+            for key, value in action.input.items():
+                print(f"  {key}: {value}")
+            print("Output:")
+            for key, value in action.output.items():
+                print(f"  {key}: {value}")
+            print(f"Success: {action.success}")
+        print("=" * 50)
 
 async def test_with_single_user():
     """Test the real agent with a single user."""
@@ -40,54 +78,36 @@ async def test_with_single_user():
     # Create a real agent
     agent = TwitterAgent()
     
+    # Reuse earlier responses to the same query when LLM_CACHE is enabled
+    cache = LLMCache()
+    
     # Get the Twitter user ID from tokens.json
-    twitter_user_id = None
     try:
-        with open('data/tokens.json', 'r') as f:
-            tokens = json.load(f)
-            if tokens:
-                # Use the first token's twitter_user_id
-                first_token_key = list(tokens.keys())[0]
-                twitter_user_id = tokens[first_token_key].get("twitter_user_id")
-                print(f"Using Twitter user ID: {twitter_user_id}")
+        twitter_user_id = load_first_twitter_user_id()
     except (FileNotFoundError, json.JSONDecodeError, IndexError, KeyError) as e:
         print(f"Error loading tokens: {str(e)}")
         print("Please make sure you have authenticated with Twitter.")
         return
     
     if not twitter_user_id:
-        twitter_user_id = input("Enter your Twitter user ID: ")
+        twitter_user_id = await asyncio.to_thread(input, "Enter your Twitter user ID: ")
     
     while True:
-        query = input("\nEnter your query (or 'exit' to quit): ")
+        query = await asyncio.to_thread(input, "\nEnter your query ('refresh' to clear cached Twitter reads, 'exit' to quit): ")
         if query.lower() == 'exit':
+            cache.log_stats()
             break
+        
+        if query.lower() == 'refresh':
+            # Fetch fresh Twitter data for the next queries
+            TwitterAgent.clear_caches()
+            print("Cleared cached responses and Twitter reads.")
+            continue
             
         # Process the query
         try:
-            response = await agent.process_query(query=query, twitter_user_id=twitter_user_id)
-            
-            # Display the response
-            print("=" * 50)
-            print("AGENT RESPONSE:")
-            print("=" * 50)
-            print(response.response)
-            print("=" * 50)
-            
-            # Display actions taken
-            if response.actions_taken:
-                print("ACTIONS TAKEN:")
-                print("=" * 50)
-                for i, action in enumerate(response.actions_taken, 1):
-                    print(f"--- Action {i}: {action.tool} ---")
-                    print("Input:")
-                    for key, value in action.input.items():
-                        print(f"  {key}: {value}")
-                    print("Output:")
-                    for key, value in action.output.items():
-                        print(f"  {key}: {value}")
-                    print(f"Success: {action.success}")
-                print("=" * 50)
+            response = await cache.process_query(agent, query=query, twitter_user_id=twitter_user_id)
+            print_response(response)
         except Exception as e:
             print(f"Error processing query: {str(e)}")
 
@@ -109,6 +129,9 @@ async def test_with_multiple_users():
     # Create a real agent
     agent = TwitterAgent()
     
+    # Reuse earlier responses to the same query when LLM_CACHE is enabled
+    cache = LLMCache()
+    
     # Get Twitter user IDs from tokens.json
     users = {}
     try:
@@ -137,12 +160,19 @@ async def test_with_multiple_users():
     while True:
         current_username, current_twitter_id = user_list[current_user_index]
         print(f"\nCurrent user: {current_username} (Twitter ID: {current_twitter_id})")
-        print("Commands: 'switch user' to change users, 'exit' to quit")
+        print("Commands: 'switch user' to change users, 'refresh' to clear cached Twitter reads, 'exit' to quit")
         
-        query = input("\nEnter your query: ")
+        query = await asyncio.to_thread(input, "\nEnter your query: ")
         
         if query.lower() == 'exit':
+            cache.log_stats()
             break
+        
+        if query.lower() == 'refresh':
+            # Fetch fresh Twitter data for the next queries
+            TwitterAgent.clear_caches()
+            print("Cleared cached responses and Twitter reads.")
+            continue
             
         if query.lower() == 'switch user':
             # Cycle to next user
@@ -152,43 +182,67 @@ async def test_with_multiple_users():
             
         # Process the query for the current user
         try:
-            response = await agent.process_query(query=query, twitter_user_id=current_twitter_id)
-            
-            # Display the response
-            print("=" * 50)
-            print(f"AGENT RESPONSE FOR {current_username}:")
-            print("=" * 50)
-            print(response.response)
-            print("=" * 50)
-            
-            # Display actions taken
-            if response.actions_taken:
-                print(f"ACTIONS TAKEN FOR {current_username}:")
-                print("=" * 50)
-                for i, action in enumerate(response.actions_taken, 1):
-                    print(f"--- Action {i}: {action.tool} ---")
-                    print("Input:")
-                    for key, value in action.input.items():
-                        print(f"  {key}: {value}")
-                    print("Output:")
-                    for key, value in action.output.items():
-                        print(f"  {key}: {value}")
-                    print(f"Success: {action.success}")
-                print("=" * 50)
+            response = await cache.process_query(agent, query=query, twitter_user_id=current_twitter_id)
+            print_response(response, f" FOR {current_username}")
         except Exception as e:
             print(f"Error processing query: {str(e)}")
 
-if __name__ == "__main__":
-    # Ask the user which test to run
-    print("Choose test mode:")
-    print("1. Single user")
-    print("2. Multiple users")
+async def run_queries_file(path: str):
+    """Run every query in a file (one per line), in order, for the first user."""
+    queries = [line.strip() for line in Path(path).read_text().splitlines() if line.strip()]
+    if not queries:
+        print(f"No queries found in {path}.")
+        return
     
-    choice = input("Enter your choice (1 or 2): ")
+    # Check for OpenAI API key
+    if not os.getenv("OPENAI_API_KEY"):
+        print("ERROR: OPENAI_API_KEY environment variable is not set.")
+        print("Please set it in your .env file or environment variables.")
+        return
+    
+    agent = TwitterAgent()
+    cache = LLMCache()
+    
+    try:
+        twitter_user_id = load_first_twitter_user_id()
+    except (FileNotFoundError, json.JSONDecodeError, IndexError, KeyError) as e:
+        print(f"Error loading tokens: {str(e)}")
+        print("Please make sure you have authenticated with Twitter.")
+        return
     
-    if choice == "1":
-        asyncio.run(test_with_single_user())
-    elif choice == "2":
-        asyncio.run(test_with_multiple_users())
+    if not twitter_user_id:
+        print("No authenticated users found. Please authenticate with Twitter first.")
+        return
+    
+    # One query at a time: the user's queries share one session agent and its history
+    for query in queries:
+        print(f"\nQUERY: {query}")
+        try:
+            response = await cache.process_query(agent, query=query, twitter_user_id=twitter_user_id)
+            print_response(response)
+        except Exception as e:
+            print(f"Error processing query: {str(e)}")
+    
+    cache.log_stats()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Twitter agent against the real APIs.")
+    parser.add_argument("--queries-file", help="Run each line of this file as a query instead of prompting")
+    args = parser.parse_args()
+    
+    if args.queries_file:
+        asyncio.run(run_queries_file(args.queries_file))
     else:
-        print("Invalid choice. Please run the script again and select 1 or 2.")
+        # Ask the user which test to run
+        print("Choose test mode:")
+        print("1. Single user")
+        print("2. Multiple users")
+        
+        choice = input("Enter your choice (1 or 2): ")
+        
+        if choice == "1":
+            asyncio.run(test_with_single_user())
+        elif choice == "2":
+            asyncio.run(test_with_multiple_users())
+        else:
+            print("Invalid choice. Please run the script again and select 1 or 2.")
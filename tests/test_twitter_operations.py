@@ -1,50 +1,35 @@
 import asyncio
 import sys
-import json
 import datetime
 from typing import Dict, Any, List, Optional
+import orjson
 
 # Add project root to path to ensure imports work
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from twitter.utils import serialize_datetime
 from twitter.api import TwitterAPI
-from database.db import get_tokens
+from database.db import get_first_active_token
 
 
-async def get_first_active_token() -> Optional[Dict[str, Any]]:
-    """
-    Get the first active token from the tokens.json file
-    """
-    tokens = await get_tokens()
-    for token_id, token in tokens.items():
-        if token.get("is_active", False):
-            return token
-    return None
-
-
-async def fetch_user_info(twitter_user_id: str) -> Dict[str, Any]:
+async def fetch_user_info(api: TwitterAPI) -> Dict[str, Any]:
     """
     Fetch information about the authenticated user
     """
-    api = TwitterAPI(twitter_user_id=twitter_user_id)
     return await api.get_user_info()
 
 
-async def fetch_timeline(twitter_user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+async def fetch_timeline(api: TwitterAPI, limit: int = 10) -> List[Dict[str, Any]]:
     """
     Fetch the user's timeline
     """
-    api = TwitterAPI(twitter_user_id=twitter_user_id)
     return await api.get_user_timeline(limit=limit)
 
 
-async def post_tweet(twitter_user_id: str, text: str) -> Dict[str, Any]:
+async def post_tweet(api: TwitterAPI, text: str) -> Dict[str, Any]:
     """
     Post a new tweet
     """
-    api = TwitterAPI(twitter_user_id=twitter_user_id)
     return await api.post_tweet(text=text)
 
 
@@ -59,6 +44,16 @@ async def main():
     twitter_user_id = token["twitter_user_id"]
     print(f"Using Twitter account: @{token['twitter_username']}")
     
+    # One client for the whole session, so its connections are reused between operations
+    api = TwitterAPI(twitter_user_id=twitter_user_id)
+    await api.initialize_client()
+    try:
+        await run_menu(api)
+    finally:
+        await api.close()
+
+
+async def run_menu(api: TwitterAPI):
     # Menu for operations
     while True:
         print("\nTwitter Operations:")
@@ -72,15 +67,15 @@ async def main():
         if choice == "1":
             # Fetch user info
             print("\nFetching user info...")
-            user_info = await fetch_user_info(twitter_user_id)
-            # Use our utility function for datetime serialization
-            print(json.dumps(user_info, indent=2, default=lambda obj: serialize_datetime(obj) if isinstance(obj, datetime.datetime) else str(obj)))
+            user_info = await fetch_user_info(api)
+            # orjson serializes datetime values natively
+            print(orjson.dumps(user_info, option=orjson.OPT_INDENT_2).decode())
         
         elif choice == "2":
             # Fetch timeline
             limit = int(input("Enter number of tweets to fetch (default 10): ") or "10")
             print(f"\nFetching {limit} tweets from timeline...")
-            timeline = await fetch_timeline(twitter_user_id, limit=limit)
+            timeline = await fetch_timeline(api, limit=limit)
             
             if not timeline:
                 print("No tweets found in timeline.")
@@ -104,7 +99,7 @@ async def main():
                 
             print("\nPosting tweet...")
             try:
-                result = await post_tweet(twitter_user_id, text)
+                result = await post_tweet(api, text)
                 print(f"Tweet posted successfully!")
                 print(f"Tweet ID: {result.get('id')}")
                 print(f"Tweet text: {result.get('text')}")
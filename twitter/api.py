@@ -1,25 +1,94 @@
+import time
+import random
+import asyncio
+import requests
+from collections import OrderedDict
 import tweepy
 from fastapi import HTTPException
 import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 from config import TWITTER_CLIENT_ID, TWITTER_CLIENT_SECRET
 from database.db import get_token_by_user_id, get_token_by_twitter_user_id, update_token, save_tweets
 from twitter.utils import serialize_datetime, serialize_tweet_data
 
+# Maximum number of Twitter API requests in flight at once across all users
+MAX_CONCURRENT_REQUESTS = 8
+
+# How long (seconds) user info and timeline responses are reused, and how many are kept
+READ_CACHE_TTL = 60
+READ_CACHE_SIZE = 1024
+
+# Retries after a 429, the backoff base (seconds) used when Twitter sends no reset time,
+# and the longest (seconds) a call will wait for a rate limit window to reset
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF = 1.0
+RATE_LIMIT_MAX_WAIT = 60.0
+
+class RateLimiter:
+    """
+    Tracks Twitter rate limit windows per endpoint and holds calls until they reset
+    """
+    def __init__(self):
+        # Endpoint key -> epoch time at which calls may resume
+        self._reset_at: Dict[Tuple, float] = {}
+    
+    async def wait(self, endpoint: Tuple) -> None:
+        """
+        Wait until the endpoint's rate limit window has reset
+        """
+        reset_at = self._reset_at.get(endpoint)
+        if reset_at is None:
+            return
+        
+        delay = reset_at - time.time()
+        if delay <= 0:
+            self._reset_at.pop(endpoint, None)
+        elif delay > RATE_LIMIT_MAX_WAIT:
+            raise HTTPException(status_code=429, detail=f"Twitter rate limit reached; retry in {int(delay)} seconds")
+        else:
+            await asyncio.sleep(delay)
+    
+    def limited(self, endpoint: Tuple, error: tweepy.TooManyRequests, attempt: int) -> None:
+        """
+        Record a 429 so later calls to the endpoint wait instead of being rejected too
+        """
+        reset = error.response.headers.get("x-rate-limit-reset")
+        if reset is not None:
+            reset_at = float(reset)
+        else:
+            # Exponential backoff with jitter when Twitter doesn't say when the window resets
+            reset_at = time.time() + RATE_LIMIT_BACKOFF * 2 ** attempt + random.uniform(0, RATE_LIMIT_BACKOFF)
+        self._reset_at[endpoint] = max(reset_at, self._reset_at.get(endpoint, 0.0))
+
 class TwitterAPI:
     """
     Wrapper for Twitter API operations using Tweepy
     """
-    def __init__(self, user_id: int = None, twitter_user_id: str = None):
+    # Shared by all instances to keep concurrent requests within Twitter rate limits
+    _request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # Strong references to running background tweet saves so they aren't garbage collected
+    _background_saves: Set[asyncio.Task] = set()
+    # Rate limit windows shared by all instances, keyed per user and endpoint
+    _rate_limiter = RateLimiter()
+    # LRU cache of recent reads: (kind, user key) -> (timestamp, limit, result)
+    _read_cache: "OrderedDict[Tuple[str, Tuple[str, Any]], Tuple[float, int, Any]]" = OrderedDict()
+    
+    def __init__(self, user_id: int = None, twitter_user_id: str = None, session: Optional[requests.Session] = None):
         """
         Initialize the Twitter API wrapper with either user_id or twitter_user_id
+        
+        An optional shared requests session can be passed so connections are pooled
+        across users; authentication is sent per request, so sharing is safe.
         """
         self.client_id = TWITTER_CLIENT_ID
         self.client_secret = TWITTER_CLIENT_SECRET
         self.user_id = user_id
         self.twitter_user_id = twitter_user_id
+        self.session = session
         self.client = None
+        # Tweet saves started by this instance that haven't finished yet
+        self._pending_saves: Set[asyncio.Task] = set()
     
     async def initialize_client(self) -> None:
         """
@@ -53,8 +122,111 @@ class TwitterAPI:
             access_token_secret=None
         )
         
+        # Reuse the shared HTTP session (and its keep-alive connections) if one was provided
+        if self.session is not None:
+            self.client.session = self.session
+        
         # Store token data
         self.token = token
+
+    async def close(self) -> None:
+        """
+        Wait for pending tweet saves, then release the HTTP session held by the Tweepy client
+        """
+        if self._pending_saves:
+            await asyncio.gather(*self._pending_saves, return_exceptions=True)
+        
+        if self.client is not None:
+            # A shared session is owned by whoever created it
+            if self.session is None:
+                self.client.session.close()
+            self.client = None
+
+    @classmethod
+    def clear_read_cache(cls) -> None:
+        """
+        Drop every cached read, so the next reads go to Twitter
+        """
+        cls._read_cache.clear()
+    
+    def _user_key(self) -> Tuple[str, str]:
+        """
+        Build the key identifying this user in caches and rate limit windows
+        
+        Keyed by the Twitter account from the token once the client is initialized, so
+        instances created with user_id and with twitter_user_id share their entries.
+        """
+        token = getattr(self, "token", None)
+        twitter_user_id = token.get("twitter_user_id") if token else self.twitter_user_id
+        return ("t", str(twitter_user_id)) if twitter_user_id else ("u", str(self.user_id))
+    
+    def _cache_key(self, kind: str) -> Tuple[str, Tuple[str, Any]]:
+        """
+        Build the read cache key for this user
+        """
+        return (kind, self._user_key())
+    
+    def _get_cached(self, kind: str, limit: int = 0) -> Optional[Any]:
+        """
+        Return a fresh cached read covering at least `limit` items, if any
+        """
+        key = self._cache_key(kind)
+        cached = self._read_cache.get(key)
+        if cached is None:
+            return None
+        cached_at, cached_limit, result = cached
+        if asyncio.get_running_loop().time() - cached_at >= READ_CACHE_TTL:
+            del self._read_cache[key]
+            return None
+        if cached_limit < limit:
+            return None
+        self._read_cache.move_to_end(key)
+        return result
+    
+    def _set_cached(self, kind: str, result: Any, limit: int = 0) -> None:
+        """
+        Cache a read result, evicting the least recently used entry when full
+        """
+        key = self._cache_key(kind)
+        self._read_cache[key] = (asyncio.get_running_loop().time(), limit, result)
+        self._read_cache.move_to_end(key)
+        if len(self._read_cache) > READ_CACHE_SIZE:
+            self._read_cache.popitem(last=False)
+    
+    def _invalidate_cached(self, kind: str) -> None:
+        """
+        Drop a cached read for this user after a write changes it
+        """
+        self._read_cache.pop(self._cache_key(kind), None)
+    
+    def _save_in_background(self, tweets: List[Dict], tweet_type: str) -> None:
+        """
+        Save tweets for the user without making the caller wait for the write
+        """
+        task = asyncio.create_task(save_tweets(str(self.user_id), tweets, tweet_type=tweet_type))
+        self._pending_saves.add(task)
+        self._background_saves.add(task)
+        task.add_done_callback(self._pending_saves.discard)
+        task.add_done_callback(self._background_saves.discard)
+    
+    async def _call(self, func, *args, **kwargs) -> Any:
+        """
+        Run a blocking Tweepy call in a worker thread so concurrent requests overlap
+        
+        Rate limited calls wait for their endpoint's window to reset and are retried.
+        """
+        endpoint = (self._user_key(), getattr(func, "__name__", repr(func)))
+        attempt = 0
+        while True:
+            await self._rate_limiter.wait(endpoint)
+            try:
+                async with self._request_semaphore:
+                    return await asyncio.to_thread(func, *args, **kwargs)
+            except tweepy.TooManyRequests as e:
+                if attempt >= RATE_LIMIT_RETRIES:
+                    raise
+                self._rate_limiter.limited(endpoint, e, attempt)
+                attempt += 1
     
     async def _get_token(self) -> Optional[Dict[str, Any]]:
         """
@@ -71,9 +243,9 @@ class TwitterAPI:
         """
         Refresh an expired access token
         """
-        from auth.oauth import OAuth2Handler
+        from auth.oauth import get_oauth_handler, invalidate_cached_login
         
-        oauth_handler = OAuth2Handler()
+        oauth_handler = get_oauth_handler()
         
         try:
             # Refresh the token
@@ -92,17 +264,34 @@ class TwitterAPI:
             # Mark token as inactive if refresh fails
             await update_token(token["id"], {"is_active": False})
             raise HTTPException(status_code=401, detail=f"Failed to refresh token: {str(e)}")
+        finally:
+            # The stored token changed, so any cached login for this user is stale
+            if token.get("twitter_user_id"):
+                invalidate_cached_login(token["twitter_user_id"])
+    
+    async def prefetch(self, timeline_limit: int = 10) -> None:
+        """
+        Warm the read cache with the user's info and timeline
+        """
+        if not self.client:
+            await self.initialize_client()
+        
+        await asyncio.gather(self.get_user_info(), self.get_user_timeline(limit=timeline_limit))
     
     async def get_user_info(self) -> Dict:
         """
         Get information about the authenticated user
         """
+        cached = self._get_cached("user_info")
+        if cached is not None:
+            return dict(cached)
+        
         if not self.client:
             await self.initialize_client()
         
         try:
             # Important: We must set user_auth=False when using OAuth 2.0 bearer tokens
-            user_info = self.client.get_me(user_auth=False)
+            user_info = await self._call(self.client.get_me, user_auth=False)
             # Create a serializable dictionary
             result = {
                 "id": user_info.data.id,
@@ -116,7 +305,11 @@ class TwitterAPI:
             created_at = getattr(user_info.data, "created_at", None)
             result["created_at"] = serialize_datetime(created_at)
             
-            return result
+            self._set_cached("user_info", result)
+            return dict(result)
+        except HTTPException:
+            # Rate-limit (429) and auth errors keep their status
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to get user info: {str(e)}")
     
@@ -131,7 +324,8 @@ class TwitterAPI:
             # According to the Tweepy docs, we need to use create_tweet method
             # with the text parameter and optionally in_reply_to_tweet_id
             # Important: We must set user_auth=False when using OAuth 2.0 bearer tokens
-            response = self.client.create_tweet(
+            response = await self._call(
+                self.client.create_tweet,
                 text=text,
                 in_reply_to_tweet_id=reply_to_id,
                 user_auth=False
@@ -145,9 +339,14 @@ class TwitterAPI:
             
             # Save the posted tweet to a JSON file
             if self.user_id:
-                await save_tweets(str(self.user_id), [tweet_data], tweet_type="posted")
+                self._save_in_background([tweet_data], "posted")
+            
+            # The new tweet shows up in the home timeline
+            self._invalidate_cached("timeline")
             
             return tweet_data
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to post tweet: {str(e)}")
     
@@ -159,7 +358,7 @@ class TwitterAPI:
             await self.initialize_client()
         
         try:
-            response = self.client.get_tweet(id=tweet_id, user_auth=False)
+            response = await self._call(self.client.get_tweet, id=tweet_id, user_auth=False)
             
             tweet_data = {
                 "id": response.data.id,
@@ -169,9 +368,11 @@ class TwitterAPI:
             
             # Save the individual tweet to a JSON file
             if self.user_id:
-                await save_tweets(str(self.user_id), [tweet_data], tweet_type="single_tweet")
+                self._save_in_background([tweet_data], "single_tweet")
             
             return tweet_data
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to get tweet: {str(e)}")
     
@@ -183,8 +384,10 @@ class TwitterAPI:
             await self.initialize_client()
         
         try:
-            response = self.client.like(tweet_id, user_auth=False)
+            response = await self._call(self.client.like, tweet_id, user_auth=False)
             return {"success": True, "tweet_id": tweet_id}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to like tweet: {str(e)}")
     
@@ -196,8 +399,10 @@ class TwitterAPI:
             await self.initialize_client()
         
         try:
-            response = self.client.unlike(tweet_id, user_auth=False)
+            response = await self._call(self.client.unlike, tweet_id, user_auth=False)
             return {"success": True, "tweet_id": tweet_id}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to unlike tweet: {str(e)}")
     
@@ -209,8 +414,12 @@ class TwitterAPI:
             await self.initialize_client()
         
         try:
-            response = self.client.follow_user(target_user_id, user_auth=False)
+            response = await self._call(self.client.follow_user, target_user_id, user_auth=False)
+            # Following changes whose tweets appear in the home timeline
+            self._invalidate_cached("timeline")
             return {"success": True, "target_user_id": target_user_id}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to follow user: {str(e)}")
     
@@ -222,8 +431,12 @@ class TwitterAPI:
             await self.initialize_client()
         
         try:
-            response = self.client.unfollow_user(target_user_id, user_auth=False)
+            response = await self._call(self.client.unfollow_user, target_user_id, user_auth=False)
+            # Following changes whose tweets appear in the home timeline
+            self._invalidate_cached("timeline")
             return {"success": True, "target_user_id": target_user_id}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to unfollow user: {str(e)}")
     
@@ -231,13 +444,19 @@ class TwitterAPI:
         """
         Get the user's timeline
         """
+        # A cached fetch of at least as many tweets is reused for a short while
+        cached = self._get_cached("timeline", limit)
+        if cached is not None:
+            return cached[:limit]
+        
         if not self.client:
             await self.initialize_client()
         
         try:
             # Include additional tweet fields to get more information
             # Important: We must set user_auth=False when using OAuth 2.0 bearer tokens
-            response = self.client.get_home_timeline(
+            response = await self._call(
+                self.client.get_home_timeline,
                 max_results=limit,
                 tweet_fields=["created_at", "author_id", "conversation_id"],
                 user_auth=False
@@ -254,9 +473,12 @@ class TwitterAPI:
             
             # Save the timeline tweets to a JSON file
             if self.user_id and tweets:
-                await save_tweets(str(self.user_id), tweets, tweet_type="timeline")
+                self._save_in_background(tweets, "timeline")
             
-            return tweets
+            self._set_cached("timeline", tweets, limit)
+            return tweets[:]
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to get timeline: {str(e)}")
     
@@ -264,11 +486,17 @@ class TwitterAPI:
         """
         Search for tweets
         """
+        # A cached search for the same query with at least as many results is reused for a short while
+        kind = f"search:{query}"
+        cached = self._get_cached(kind, limit)
+        if cached is not None:
+            return cached[:limit]
+        
         if not self.client:
             await self.initialize_client()
         
         try:
-            response = self.client.search_recent_tweets(query=query, max_results=limit, user_auth=False)
+            response = await self._call(self.client.search_recent_tweets, query=query, max_results=limit, user_auth=False)
             
             tweets = []
             if hasattr(response, "data") and response.data:
@@ -278,8 +506,11 @@ class TwitterAPI:
                 
                 # Save the search results to a JSON file
                 if self.user_id and tweets:
-                    await save_tweets(str(self.user_id), tweets, tweet_type=f"search_{query}")
+                    self._save_in_background(tweets, f"search_{query}")
             
-            return tweets
+            self._set_cached(kind, tweets, limit)
+            return tweets[:]
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to search tweets: {str(e)}")